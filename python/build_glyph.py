@@ -20,12 +20,26 @@ subsetted output, only ~200 glyphs actually survive — so calling
 the old order, so callers that haven't been updated still work.
 """
 
+import math
+import os
+import sys
+from array import array
+
+from fontTools.misc.roundTools import otRound
 from fontTools.pens.ttGlyphPen import TTGlyphPen
 from fontTools.pens.transformPen import TransformPen
-from fontTools.pens.recordingPen import DecomposingRecordingPen
+from fontTools.pens.basePen import AbstractPen
+from fontTools.pens.recordingPen import DecomposingRecordingPen, RecordingPen
+from fontTools.ttLib.tables import ttProgram
+from fontTools.ttLib.tables._g_l_y_f import (
+    Glyph,
+    GlyphCoordinates,
+    flagCubic,
+    flagOnCurve,
+)
 
 from mappings.csv_parser import WORD_SCRIPTS, get_word_unit_script
-from utils import get_glyph_name_by_char, step_timer
+from utils import glyph_resolver, step_timer
 
 GLYPH_PREFIX = "wingfont"
 # DIY manual-annotation mark glyphs (one per CSV-A entry). Named by their
@@ -37,6 +51,13 @@ MARK_PREFIX = "wingfontmark"
 # strip it to an annotation-free scaled base before stacking a mark.
 # Named by the base codepoint, e.g. ``wingfontbare00884C`` for 行.
 BARE_PREFIX = "wingfontbare"
+# --component-bases helper glyphs. A char's scaled base outline is stored
+# once (``wingfontbase00884C`` for 行, unless its bare glyph can play that
+# part) and each distinct annotation block once (``wingfontanno000000``,
+# numbered in first-use order); the variant glyphs are then composites of
+# the two. Never mapped in cmap.
+BASE_PREFIX = "wingfontbase"
+ANNO_PREFIX = "wingfontanno"
 
 
 def _draw_decomposed(glyph_set, glyph_name, target_pen):
@@ -151,6 +172,85 @@ def _draw_shaped(
                 x_position += anno_spacing_units
 
 
+class _FlatRecording(AbstractPen):
+    """A RecordingPen for decomposed outlines, stored flat: one byte per
+    segment type, one point count per segment and every coordinate in a
+    single array of doubles. A RecordingPen keeps a tuple of float
+    tuples per segment — about 100 bytes a point against 16 here —
+    which for the annotation outline cache (one laid-out recording per
+    distinct annotation string, alive for the whole of Phase 1) added
+    tens of MB on large mappings. `replay` calls the target pen with
+    the same values a RecordingPen would, so output is unchanged."""
+
+    # Segment types; _QCURVE_OPEN is a qCurveTo whose last point is
+    # None (a TrueType contour with no on-curve points).
+    _MOVE, _LINE, _CURVE, _QCURVE, _QCURVE_OPEN, _CLOSE, _END = range(7)
+
+    __slots__ = ("ops", "counts", "coords")
+
+    def __init__(self):
+        self.ops = bytearray()
+        self.counts = array("H")
+        self.coords = array("d")
+
+    @property
+    def nbytes(self):
+        return (
+            len(self.ops)
+            + self.counts.itemsize * len(self.counts)
+            + self.coords.itemsize * len(self.coords)
+        )
+
+    def _add(self, op, points):
+        self.ops.append(op)
+        self.counts.append(len(points))
+        for x, y in points:
+            self.coords.append(x)
+            self.coords.append(y)
+
+    def moveTo(self, pt):
+        self._add(self._MOVE, (pt,))
+
+    def lineTo(self, pt):
+        self._add(self._LINE, (pt,))
+
+    def curveTo(self, *points):
+        self._add(self._CURVE, points)
+
+    def qCurveTo(self, *points):
+        if points and points[-1] is None:
+            self._add(self._QCURVE_OPEN, points[:-1])
+        else:
+            self._add(self._QCURVE, points)
+
+    def closePath(self):
+        self._add(self._CLOSE, ())
+
+    def endPath(self):
+        self._add(self._END, ())
+
+    def replay(self, pen):
+        coords = self.coords
+        i = 0
+        for op, n in zip(self.ops, self.counts):
+            points = [(coords[j], coords[j + 1]) for j in range(i, i + 2 * n, 2)]
+            i += 2 * n
+            if op == self._MOVE:
+                pen.moveTo(points[0])
+            elif op == self._LINE:
+                pen.lineTo(points[0])
+            elif op == self._CURVE:
+                pen.curveTo(*points)
+            elif op == self._QCURVE:
+                pen.qCurveTo(*points)
+            elif op == self._QCURVE_OPEN:
+                pen.qCurveTo(*points, None)
+            elif op == self._CLOSE:
+                pen.closePath()
+            else:
+                pen.endPath()
+
+
 def _add_cmap_entry(output_font, codepoint, glyph_name):
     """Map `codepoint` → `glyph_name` in every cmap subtable that can
     represent it. Supplementary-plane codepoints (> U+FFFF, e.g. the
@@ -169,6 +269,651 @@ def _add_cmap_entry(output_font, codepoint, glyph_name):
     return added
 
 
+class _CharComposer:
+    """Draws single-char composites: the scaled base outline plus its
+    shaped annotation block, at the offsets generate_annotated_glyphs
+    worked out for this build.
+
+    Owns the per-build shaping and outline caches. The serial loop and
+    the ``jobs > 1`` worker processes (see `_compose_chunk`) both draw
+    through this class, which is what keeps their outlines identical.
+    The word-unit path reuses the annotation half (`shape_annotation` /
+    `annotation_width` / `draw_annotation`)."""
+
+    def __init__(
+        self,
+        base_glyph_set,
+        anno_glyph_set,
+        hb_font,
+        anno_glyph_order,
+        *,
+        anno_location_key,
+        anno_scale_eff,
+        anno_spacing_units,
+        base_scale,
+        base_y_offset,
+        anno_y_offset,
+        pen_glyph_set=None,
+    ):
+        import uharfbuzz as hb
+
+        self.base_glyph_set = base_glyph_set
+        self.anno_glyph_set = anno_glyph_set
+        self.hb_font = hb_font
+        self.anno_glyph_order = anno_glyph_order
+        self.anno_glyph_order_set = set(anno_glyph_order)
+        self.anno_location_key = anno_location_key
+        self.anno_scale_eff = anno_scale_eff
+        self.anno_spacing_units = anno_spacing_units
+        self.base_scale = base_scale
+        self.base_y_offset = base_y_offset
+        self.anno_y_offset = anno_y_offset
+        self.pen_glyph_set = pen_glyph_set
+        # Separate from the word path's buffer — shaping results don't
+        # depend on which buffer ran them, only on allocation count.
+        self.hb_buffer = hb.Buffer()
+
+        # ── Annotation shaping cache ─────────────────────────────────
+        # Annotation strings repeat massively across a mapping:
+        # canto-lshk's ~137k rows reduce to a few hundred distinct
+        # Jyutping syllables, yet every (char, annotation) pair used to
+        # go through HarfBuzz again. The shaped run depends only on the
+        # string and the axis location the HB font was pinned to (the
+        # face is fixed for the whole build), so memoise on exactly
+        # that. Entries are never mutated downstream — _shaped_width /
+        # _draw_shaped only read them.
+        self.shape_cache: dict = {}
+        self.shape_hits = 0
+
+        # ── Annotation outline cache ─────────────────────────────────
+        # Same reasoning as the shaping cache: "hang4" used to be
+        # decomposed letter by letter for every character that reads
+        # hang4. The laid-out block (decomposed, scaled, spaced, with
+        # the HarfBuzz offsets applied) is recorded once at the origin
+        # and stamped onto each base with a plain translation, so
+        # composition costs one outline copy per glyph instead of one
+        # decompose per letter. Recordings are kept flat (see
+        # _FlatRecording): there is one per distinct annotation string
+        # and they live through the whole composition phase.
+        self.anno_recordings: dict = {}
+        # --component-bases: {(anno_str, location, sub-unit x): (helper
+        # glyph name, integer x it was drawn at, y_range)}.
+        self.anno_helpers: dict = {}
+
+    def shape_annotation(self, anno_str):
+        """Shape `anno_str` against the annotation font, memoised on
+        ``(anno_str, anno_axis_location)``."""
+        key = (anno_str, self.anno_location_key)
+        anno_shaped = self.shape_cache.get(key)
+        if anno_shaped is None:
+            anno_shaped = _shape_run(
+                self.hb_font,
+                self.hb_buffer,
+                anno_str,
+                self.anno_glyph_order,
+                self.anno_glyph_order_set,
+            )
+            self.shape_cache[key] = anno_shaped
+        else:
+            self.shape_hits += 1
+        return anno_shaped
+
+    def annotation_width(self, anno_shaped):
+        """Shaped-block width in OUTPUT units — delegates to the
+        module-level `_shaped_width`."""
+        return _shaped_width(
+            anno_shaped, self.anno_scale_eff, self.anno_spacing_units
+        )
+
+    def draw_annotation(self, pen, anno_str, anno_shaped, x_start, y_offset):
+        """Draw the shaped run for `anno_str` into `pen` at
+        (`x_start`, `y_offset`). The first call per string records the
+        block via the module-level `_draw_shaped`; later calls replay
+        that recording translated."""
+        key = (anno_str, self.anno_location_key)
+        rec = self.anno_recordings.get(key)
+        if rec is None:
+            rec = _FlatRecording()
+            _draw_shaped(
+                rec,
+                anno_shaped,
+                0,
+                0,
+                self.anno_glyph_set,
+                self.anno_scale_eff,
+                self.anno_spacing_units,
+            )
+            self.anno_recordings[key] = rec
+        rec.replay(TransformPen(pen, (1, 0, 0, 1, x_start, y_offset)))
+
+    def variant_lsb(self, base_advance_width, base_lsb, anno_len):
+        """hmtx LSB of a composed variant: the left edge of whichever of
+        the scaled base / centred annotation reaches further left,
+        shifted by the (1 - base_scale) centring margin."""
+        base_scale = self.base_scale
+        return round(
+            max(
+                0,
+                min(
+                    (base_advance_width * base_scale - anno_len) / 2,
+                    base_lsb * base_scale,
+                )
+                + (1 - base_scale) * base_advance_width / 2,
+            )
+        )
+
+    def record_base(self, glyph_name):
+        """Decompose + scale the base outline once per character: a
+        polyphonic char with N readings stamps it N times, plus once
+        more for the bare DIY base. Recorded with the x/y offset left at
+        zero; every use only translates it."""
+        base_rec = RecordingPen()
+        _draw_decomposed(
+            self.base_glyph_set,
+            glyph_name,
+            TransformPen(
+                base_rec, (self.base_scale, 0, 0, self.base_scale, 0, 0)
+            ),
+        )
+        return base_rec
+
+    def compose_char(
+        self, glyph_name, base_advance_width, base_lsb, anno_strs, *, with_bare
+    ):
+        """Compose every reading variant of one base glyph.
+
+        Returns ``(variants, bare)``: `variants` holds one
+        ``(glyph, lsb, y_range)`` per entry of `anno_strs`, where
+        `y_range` is the ``(min_y, max_y)`` ink extent (None for an
+        ink-less glyph); `bare` is ``(glyph, lsb)`` for the DIY
+        annotation-free scaled base, or None unless `with_bare`."""
+        base_scale = self.base_scale
+        base_rec = self.record_base(glyph_name)
+
+        variants = []
+        for anno_str in anno_strs:
+            pen = TTGlyphPen(self.pen_glyph_set)
+            base_rec.replay(
+                TransformPen(pen, (1, 0, 0, 1, 0, self.base_y_offset))
+            )
+
+            # Shape the annotation string with HarfBuzz — this applies
+            # the annotation font's GSUB rules (Indic reordering,
+            # Arabic positional forms, …) and GPOS positioning
+            # (mark-to-base anchors that put Thai vowels above their
+            # consonants, kerning, …), then draw the run centred over
+            # the scaled base. The shaping/layout mechanics are shared
+            # with the word-unit path.
+            anno_shaped = self.shape_annotation(anno_str)
+            anno_len = self.annotation_width(anno_shaped)
+            self.draw_annotation(
+                pen,
+                anno_str,
+                anno_shaped,
+                (base_advance_width * base_scale - anno_len) / 2,
+                self.anno_y_offset,
+            )
+
+            lsb = self.variant_lsb(base_advance_width, base_lsb, anno_len)
+            composed_glyph = pen.glyph()
+            # Track the composed glyph's ink extent so the caller can
+            # auto-fit the output ascent to the tallest annotation.
+            variants.append(
+                (composed_glyph, lsb, _glyph_y_range(composed_glyph))
+            )
+
+        bare = None
+        if with_bare:
+            bare_pen = TTGlyphPen(self.pen_glyph_set)
+            # x-centre the scaled base (same effective placement the
+            # baked composite ends up at), so a DIY-annotated 行 sits
+            # at the same x as the automatic composite 行.
+            bare_x = (base_advance_width * (1 - base_scale)) / 2
+            base_rec.replay(
+                TransformPen(
+                    bare_pen, (1, 0, 0, 1, bare_x, self.base_y_offset)
+                )
+            )
+            bare = (bare_pen.glyph(), round(base_lsb * base_scale + bare_x))
+        return variants, bare
+
+    def compose_char_components(
+        self,
+        glyph_name,
+        base_advance_width,
+        base_lsb,
+        anno_strs,
+        *,
+        bare_name,
+        base_helper_name,
+        add_helper,
+    ):
+        """`compose_char` for the ``--component-bases`` output mode.
+
+        Same return shape, but every variant is a two-component
+        composite: the char's scaled base plus the annotation block,
+        stored once per distinct string and shifted into place by the
+        component's offset. glyf can't mix contours and components in
+        one glyph, so the annotation half has to be a component too.
+        The base is the bare glyph itself when one is wanted
+        (`bare_name` not None) and its centring offset is integral,
+        else a helper named `base_helper_name`; a char whose base
+        would be referenced only once is composed flattened instead.
+        Composites flatten to the same coordinates as `compose_char`'s
+        glyphs. `add_helper(glyph, name)` stores a glyph the variants
+        reference and returns the name actually used."""
+        base_scale = self.base_scale
+        bare_x = (base_advance_width * (1 - base_scale)) / 2
+        # Component offsets are integers; an integral bare_x lands
+        # every point exactly where the flattened bare glyph has it.
+        bare_is_base = bare_name is not None and float(bare_x).is_integer()
+        if not bare_is_base and len(anno_strs) < 2:
+            return self.compose_char(
+                glyph_name,
+                base_advance_width,
+                base_lsb,
+                anno_strs,
+                with_bare=bare_name is not None,
+            )
+        base_rec = self.record_base(glyph_name)
+        if bare_is_base:
+            base_glyph = self._helper_glyph(
+                base_rec, bare_x, self.base_y_offset
+            )
+            base_helper = add_helper(base_glyph, bare_name)
+            base_dx = -int(bare_x)
+        else:
+            base_glyph = self._helper_glyph(
+                base_rec, 0, self.base_y_offset
+            )
+            base_helper = add_helper(base_glyph, base_helper_name)
+            base_dx = 0
+        base_y_range = _glyph_y_range(base_glyph)
+
+        variants = []
+        for anno_str in anno_strs:
+            anno_shaped = self.shape_annotation(anno_str)
+            anno_len = self.annotation_width(anno_shaped)
+            x_start = (base_advance_width * base_scale - anno_len) / 2
+            # The first char to use a block fixes where its helper is
+            # drawn; later chars whose centred block lands on the same
+            # sub-unit x (an integer component offset can't express
+            # fractions) reuse it, shifted by the difference. Same-
+            # advance chars — all of them, in a CJK font — get a zero
+            # offset, which stays the cheapest component encoding.
+            x_floor = math.floor(x_start)
+            key = (anno_str, self.anno_location_key, x_start - x_floor)
+            helper = self.anno_helpers.get(key)
+            if helper is None:
+                anno_glyph = TTGlyphPen(None)
+                self.draw_annotation(
+                    anno_glyph, anno_str, anno_shaped, x_start,
+                    self.anno_y_offset,
+                )
+                anno_glyph = anno_glyph.glyph()
+                helper = (
+                    add_helper(anno_glyph, None),
+                    x_floor,
+                    _glyph_y_range(anno_glyph),
+                )
+                self.anno_helpers[key] = helper
+            anno_helper, helper_x, anno_y_range = helper
+
+            pen = TTGlyphPen(self.pen_glyph_set)
+            pen.addComponent(base_helper, (1, 0, 0, 1, base_dx, 0))
+            pen.addComponent(
+                anno_helper, (1, 0, 0, 1, x_floor - helper_x, 0)
+            )
+            lsb = self.variant_lsb(base_advance_width, base_lsb, anno_len)
+            y_ranges = [r for r in (base_y_range, anno_y_range) if r]
+            y_range = None
+            if y_ranges:
+                y_range = (
+                    min(r[0] for r in y_ranges),
+                    max(r[1] for r in y_ranges),
+                )
+            variants.append((pen.glyph(), lsb, y_range))
+
+        bare = None
+        if bare_name is not None:
+            bare_glyph = base_glyph
+            if not bare_is_base:
+                bare_glyph = self._helper_glyph(
+                    base_rec, bare_x, self.base_y_offset
+                )
+            bare = (bare_glyph, round(base_lsb * base_scale + bare_x))
+        return variants, bare
+
+    def _helper_glyph(self, rec, dx, dy):
+        """Replay `rec` translated by (`dx`, `dy`) into a new glyph."""
+        pen = TTGlyphPen(None)
+        rec.replay(TransformPen(pen, (1, 0, 0, 1, dx, dy)))
+        return pen.glyph()
+
+
+def _glyph_y_range(glyph):
+    """``(min_y, max_y)`` of a simple glyph's points, None when it has
+    no ink."""
+    coords = getattr(glyph, "coordinates", None)
+    if coords is None or not len(coords):
+        return None
+    ys = [y for _x, y in coords]
+    return (min(ys), max(ys))
+
+
+# ── Parallel (jobs > 1) composition ──────────────────────────────────
+# Worker processes compose single-char glyphs only; naming, hmtx/vmtx,
+# cmap and the mapping mutation stay in the parent, which walks the
+# mapping in the same order as the serial path — so `wingfontNNNNNN`
+# names, and therefore the output bytes, don't depend on `jobs`.
+# Outlines travel back as compiled glyf records (the compact
+# coordinate/flag arrays); the parent wraps them in Glyph(data), which
+# glyf decompiles on first access. Each worker opens its own lazily
+# loaded copies of the fonts on its first chunk.
+
+_worker_config = None
+_worker_composer = None
+_worker_glyf = None
+
+
+def _init_compose_worker(config):
+    """ProcessPoolExecutor initializer: stash the build configuration.
+    The fonts themselves are opened lazily by the first `_compose_chunk`
+    call, so an idle worker costs nothing."""
+    global _worker_config, _worker_composer, _worker_glyf
+    _worker_config = config
+    _worker_composer = None
+    _worker_glyf = None
+
+
+def _compose_chunk(items):
+    """Compose one chunk of ``(glyph_name, advance, lsb, anno_strs,
+    with_bare)`` items in a worker process. Returns ``(results,
+    shape_hits, shape_misses)``; each result mirrors
+    `_CharComposer.compose_char` with glyphs compiled to bytes."""
+    global _worker_composer, _worker_glyf
+    import io as _io
+
+    if _worker_composer is None:
+        import uharfbuzz as hb
+        from fontTools.ttLib import TTFont as _TTFont
+
+        cfg = _worker_config
+        base_source = cfg["base_font_file"]
+        if base_source is None:
+            base_source = _io.BytesIO(cfg["base_font_bytes"])
+        base_font = _TTFont(base_source, lazy=True)
+        anno_font = _TTFont(_io.BytesIO(cfg["anno_font_bytes"]), lazy=True)
+        hb_font = hb.Font(hb.Face(cfg["anno_font_bytes"]))
+        if cfg["anno_axis_location"]:
+            hb_font.set_variations(
+                {k: float(v) for k, v in cfg["anno_axis_location"].items()}
+            )
+        _worker_glyf = base_font["glyf"]
+        _worker_composer = _CharComposer(
+            base_font.getGlyphSet(location=cfg["base_axis_location"]),
+            anno_font.getGlyphSet(location=cfg["anno_axis_location"]),
+            hb_font,
+            anno_font.getGlyphOrder(),
+            **cfg["composer_kwargs"],
+        )
+
+    composer = _worker_composer
+    hits_before = composer.shape_hits
+    misses_before = len(composer.shape_cache)
+    results = []
+    for glyph_name, advance, lsb, anno_strs, with_bare in items:
+        variants, bare = composer.compose_char(
+            glyph_name, advance, lsb, anno_strs, with_bare=with_bare
+        )
+        results.append(
+            (
+                [(g.compile(_worker_glyf), v_lsb, y_range)
+                 for g, v_lsb, y_range in variants],
+                None if bare is None
+                else (bare[0].compile(_worker_glyf), bare[1]),
+            )
+        )
+    return (
+        results,
+        composer.shape_hits - hits_before,
+        len(composer.shape_cache) - misses_before,
+    )
+
+
+def _compose_in_pool(items, jobs, config):
+    """Run `_compose_chunk` over `items` on `jobs` worker processes.
+    Returns ``(results, shape_hits, shape_misses)`` with `results` in
+    the same order as `items`."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    # A few chunks per worker evens out the load (polyphonic chars are
+    # much more expensive than single-reading ones) without paying the
+    # per-task pickling overhead on every character.
+    chunk_size = max(1, -(-len(items) // (jobs * 4)))
+    chunks = [
+        items[k : k + chunk_size] for k in range(0, len(items), chunk_size)
+    ]
+    results = []
+    hits = misses = 0
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_compose_worker,
+        initargs=(config,),
+    ) as pool:
+        for chunk_results, h, m in pool.map(_compose_chunk, chunks):
+            hits += h
+            misses += m
+            for variants, bare in chunk_results:
+                results.append(
+                    (
+                        [(Glyph(data), lsb, y_range)
+                         for data, lsb, y_range in variants],
+                        None if bare is None else (Glyph(bare[0]), bare[1]),
+                    )
+                )
+    return results, hits, misses
+
+
+# ── On-disk composition cache ────────────────────────────────────────
+# Composition is the multi-minute step of a build, and iterating on a
+# mapping reruns it for every character even when one row changed. With
+# a cache directory, each composed single-char variant (and bare base)
+# is stored as its compiled glyf record, so a rerun only composes the
+# (glyph, annotation) pairs it hasn't seen under the same inputs.
+#
+# Entries are grouped into one bucket file per build configuration —
+# base/annotation font content, axis locations, and every scale/offset
+# that reaches `_CharComposer` (anno_below / invert arrive as the y
+# offsets) — named by the digest of that configuration. Inside a bucket
+# the key is ``(base_glyph, anno_str)``, with ``(base_glyph, None)`` for
+# the bare base. Buckets are the LRU unit: every hit or store refreshes
+# the file's mtime, and after a store the oldest other buckets are
+# deleted until the directory fits in `max_bytes`. marshal for the same
+# reasons as csv_parser's mapping cache; its format is
+# interpreter-specific, hence the versions in the key. The fontTools
+# and HarfBuzz versions are in it too: the glyphs are drawn from
+# HarfBuzz's shaping, so an upgrade of either can change them.
+#
+# Bump when the payload layout or the composition geometry changes.
+_COMPOSITION_CACHE_FORMAT = 1
+COMPOSITION_CACHE_MAX_BYTES = 1 << 30
+_COMPOSITION_CACHE_SUFFIX = ".glyphs"
+
+
+def _font_digest(source):
+    """sha256 hex digest of a font given as a file path or raw bytes."""
+    import hashlib
+
+    digest = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray)):
+        digest.update(source)
+    else:
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+class _CompositionCache:
+    """One bucket of the on-disk composition cache (see the comment
+    block above). Values are ``(glyf_bytes, lsb, y_range)`` per variant
+    and ``(glyf_bytes, lsb)`` per bare base, exactly what the worker
+    processes send back.
+
+    `cache_dir` None keeps the bucket in memory only — what batch
+    builds without a cache directory share through `shared_state`."""
+
+    def __init__(self, cache_dir, digest, max_bytes):
+        self.cache_dir = cache_dir
+        self.path = None
+        if cache_dir is not None:
+            self.path = os.path.join(
+                cache_dir, digest[:32] + _COMPOSITION_CACHE_SUFFIX
+            )
+        self.max_bytes = max_bytes
+        self.entries: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if self.path is not None:
+            self._load()
+
+    @staticmethod
+    def digest(key_parts):
+        """Bucket name for `key_parts`, versioned like the payload."""
+        import hashlib
+        import marshal
+
+        import fontTools
+        import uharfbuzz as hb
+
+        return hashlib.sha256(repr((
+            _COMPOSITION_CACHE_FORMAT, marshal.version,
+            sys.version_info[:2], fontTools.version,
+            hb.__version__, hb.version_string(), key_parts,
+        )).encode()).hexdigest()
+
+    def _load(self):
+        import gc
+        import marshal
+
+        # Same GC pause as csv_parser._read_cache: tens of thousands of
+        # small tuples, allocated while a CJK font is already loaded.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.path, "rb") as f:
+                header = marshal.load(f)
+                if header.get("format") != _COMPOSITION_CACHE_FORMAT:
+                    return
+                self.entries = marshal.load(f)
+            os.utime(self.path)
+        except FileNotFoundError:
+            return
+        except (OSError, EOFError, ValueError, TypeError, AttributeError):
+            self.entries = {}
+            return
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        print(
+            f"[composition-cache] loaded {len(self.entries)} entries: "
+            f"{self.path}"
+        )
+
+    def get(self, glyph_name, anno_str):
+        value = self.entries.get((glyph_name, anno_str))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, glyph_name, anno_str, value):
+        self.entries[(glyph_name, anno_str)] = value
+        self._dirty = True
+
+    def store(self):
+        """Write the bucket back if anything was added, then evict the
+        least recently used other buckets over `max_bytes`. A failed
+        store only costs the next run a recompose."""
+        import marshal
+
+        if not self._dirty or self.path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                marshal.dump({"format": _COMPOSITION_CACHE_FORMAT}, f)
+                marshal.dump(self.entries, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+            print(
+                f"[composition-cache] stored {len(self.entries)} entries: "
+                f"{self.path}"
+            )
+        except (OSError, ValueError) as e:
+            print(f"[composition-cache] could not store {self.path}: {e}")
+            return
+        self._evict()
+
+    def _evict(self):
+        buckets = []
+        total = 0
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(_COMPOSITION_CACHE_SUFFIX):
+                        continue
+                    st = entry.stat()
+                    total += st.st_size
+                    if entry.path != self.path:
+                        buckets.append((st.st_mtime, st.st_size, entry.path))
+        except OSError:
+            return
+        # Oldest first; the bucket this build just used is never a
+        # candidate, even when it alone exceeds the bound.
+        for _mtime, size, path in sorted(buckets):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            print(f"[composition-cache] evicted: {path}")
+
+
+# Rough per-entry footprints for shared_state_nbytes: a shaped run is a
+# short list of small tuples; a recorded annotation outline is its
+# _FlatRecording's arrays plus this much object overhead.
+_SHAPE_ENTRY_BYTES = 400
+_ANNO_OUTLINE_ENTRY_BYTES = 300
+
+
+def shared_state_nbytes(shared_state) -> int:
+    """Approximate memory held by a `generate_annotated_glyphs`
+    `shared_state` dict, for callers that keep one alive and cap it.
+    Composed glyphs are counted by their compiled size, recorded
+    annotation outlines by their arrays, shaped runs by the estimate
+    above."""
+    total = 0
+    for key, value in shared_state.items():
+        if key == "composition":
+            for bucket in value.values():
+                total += sum(len(v[0]) + 64 for v in bucket.entries.values())
+        elif key[0] == "shape":
+            total += len(value) * _SHAPE_ENTRY_BYTES
+        elif key[0] == "anno_outline":
+            total += sum(
+                rec.nbytes + _ANNO_OUTLINE_ENTRY_BYTES
+                for rec in value.values()
+            )
+    return total
+
+
 def generate_annotated_glyphs(
     base_font,
     anno_font,
@@ -191,6 +936,13 @@ def generate_annotated_glyphs(
     char_metrics: dict | None = None,
     emit_bare_bases: bool = True,
     bare_base_map: dict | None = None,
+    jobs: int = 1,
+    base_font_file: str | None = None,
+    component_bases: bool = False,
+    composition_cache: str | None = None,
+    composition_cache_max_bytes: int = COMPOSITION_CACHE_MAX_BYTES,
+    base_font_source: str | None = None,
+    shared_state: dict | None = None,
 ):
     """
     Compose annotated variant glyphs (former Part 1 of generate_glyphs).
@@ -306,6 +1058,61 @@ def generate_annotated_glyphs(
     because the word path also extends the typo + descent metrics (it
     adds a whole annotation row), whereas the CJK path widens only the
     clipping ascent (see wing-font.py's `_auto_fit_ascent`).
+
+    Parallel composition
+    --------------------
+
+    `jobs > 1` composes the single-char glyphs on that many worker
+    processes (word-unit entries stay in this process). Each worker
+    re-opens the fonts itself: the base from `base_font_file` when the
+    in-memory `base_font` still matches that file, otherwise from
+    `base_font_bytes` or a one-off serialisation of `base_font`. Glyph
+    names are assigned here in mapping order either way, so the output
+    is byte-identical to `jobs=1`. Pyodide can't start processes, so it
+    always composes serially.
+
+    Component bases
+    ---------------
+
+    `component_bases=True` stores each single-char variant as a glyf
+    composite instead of flattened contours: the char's scaled base
+    (its bare glyph when that sits at an integral offset, else a
+    ``wingfontbase*`` helper) plus one ``wingfontanno*`` helper per
+    distinct annotation string, shifted into place by the component
+    offset. A char whose base only one glyph would reference stays
+    flattened, so the mode costs at most one extra glyph per polyphonic
+    char plus one per distinct annotation. Rendered outlines are
+    identical; polyphonic chars and widely shared readings get much
+    smaller. Composes serially — `jobs` is ignored in this mode.
+
+    Composition cache
+    -----------------
+
+    `composition_cache` names a directory of previously composed
+    single-char variants (see `_CompositionCache`). Only the
+    ``(base glyph, annotation)`` pairs missing from it are composed —
+    serially or on `jobs` workers — and the new ones are stored back,
+    evicting least recently used buckets beyond
+    `composition_cache_max_bytes`. The base font is identified by the
+    file at `base_font_source` (the path it was loaded from, before any
+    instancing, which `base_axis_location` then pins down), falling
+    back to `base_font_bytes` or a serialisation of `base_font`. Cached
+    glyphs are the same compiled records the workers return, so the
+    output is byte-identical with or without the cache. Ignored with
+    `component_bases`, whose helper glyphs are named during
+    composition.
+
+    Shared state
+    ------------
+
+    `shared_state` is a dict the caller keeps alive across calls (the
+    `wing-font.py batch` driver passes one per run). Calls with the same
+    annotation font share the HarfBuzz font and the annotation shaping
+    and outline caches through it, and calls with the same fonts, locations, scales and
+    offsets share one composition-cache bucket — in memory when no
+    `composition_cache` directory is given — so a later build only
+    composes the ``(base glyph, annotation)`` pairs no earlier build
+    did. Output is unaffected.
     """
     # Lazy import so the module loads cheaply on hosts that don't run
     # the composition path (test scripts, etc.). The Pyodide worker
@@ -318,19 +1125,33 @@ def generate_annotated_glyphs(
     # the same face. Re-creating the face per shape would be wasteful
     # when a 100k-row mapping triggers tens of thousands of shape
     # calls.
-    hb_face = hb.Face(anno_font_bytes)
-    hb_font = hb.Font(hb_face)
-    # When the annotation font is a variable font and the caller
-    # picked a non-default axis location, push the same coordinates
-    # into the HB shaper so substitutions / mark anchors that depend
-    # on the axis (e.g. weight-specific kerning) match the glyph
-    # outlines we'll later draw from `anno_glyph_set`. `set_variations`
-    # silently ignores tags the face doesn't actually declare, so
-    # passing a stray axis is harmless.
-    if anno_axis_location:
-        hb_font.set_variations(
-            {k: float(v) for k, v in anno_axis_location.items()}
-        )
+    #
+    # Under `shared_state` the font object itself carries over too,
+    # keyed like the shaping cache below.
+    anno_digest = None
+    if shared_state is not None or composition_cache:
+        anno_digest = _font_digest(anno_font_bytes)
+    hb_key = (
+        "hb_font", anno_digest,
+        tuple(sorted((anno_axis_location or {}).items())),
+    )
+    hb_font = shared_state.get(hb_key) if shared_state is not None else None
+    if hb_font is None:
+        hb_face = hb.Face(anno_font_bytes)
+        hb_font = hb.Font(hb_face)
+        # When the annotation font is a variable font and the caller
+        # picked a non-default axis location, push the same coordinates
+        # into the HB shaper so substitutions / mark anchors that depend
+        # on the axis (e.g. weight-specific kerning) match the glyph
+        # outlines we'll later draw from `anno_glyph_set`.
+        # `set_variations` silently ignores tags the face doesn't
+        # actually declare, so passing a stray axis is harmless.
+        if anno_axis_location:
+            hb_font.set_variations(
+                {k: float(v) for k, v in anno_axis_location.items()}
+            )
+        if shared_state is not None:
+            shared_state[hb_key] = hb_font
     # The fontTools anno_font is still used for glyph-name resolution
     # (HarfBuzz returns numeric glyph IDs; we need names to feed
     # `anno_glyph_set[name].draw(...)` below). The HB glyph index
@@ -346,9 +1167,9 @@ def generate_annotated_glyphs(
         # fonts ignore the kwarg entirely.
         base_glyph_set = base_font.getGlyphSet(location=base_axis_location)
         anno_glyph_set = anno_font.getGlyphSet(location=anno_axis_location)
-        # The output font's variable axes mirror the base font's (we
-        # initialised output_font = TTFont(base_font_file)), so we use
-        # the same base axis location.
+        # The output font's variable axes mirror the base font's (it is
+        # derived from base_font, see utils.derive_font), so we use the
+        # same base axis location.
         output_glyph_set = output_font.getGlyphSet(location=base_axis_location)
 
         anno_glyph_order = anno_font.getGlyphOrder()
@@ -357,7 +1178,7 @@ def generate_annotated_glyphs(
         # list returned by getGlyphOrder() — this matters when the inner
         # loop checks `glyph_name in base_glyph_order` for every char.
         base_glyph_order_set = set(base_glyph_order)
-        anno_glyph_order_set = set(anno_glyph_order)
+        resolve_base = glyph_resolver(base_font).glyph_name
 
         units_per_em = base_font["head"].unitsPerEm
 
@@ -433,6 +1254,19 @@ def generate_annotated_glyphs(
         # loop because every annotated glyph uses the same value.
         anno_spacing_units = round(units_per_em * anno_spacing)
 
+        # Everything _CharComposer needs beyond the fonts themselves —
+        # also shipped to the worker processes when jobs > 1.
+        composer_kwargs = {
+            "anno_location_key": tuple(
+                sorted((anno_axis_location or {}).items())
+            ),
+            "anno_scale_eff": anno_scale_eff,
+            "anno_spacing_units": anno_spacing_units,
+            "base_scale": base_scale,
+            "base_y_offset": base_y_offset,
+            "anno_y_offset": anno_y_offset,
+        }
+
         # ── Word-unit (Arabic) annotation placement ──────────────────
         # Default is BELOW the word: the annotation's tallest ink
         # (approximated by the annotation font's hhea ascent, scaled)
@@ -486,25 +1320,34 @@ def generate_annotated_glyphs(
                 hb_f, hb_buffer, text, glyph_order, glyph_order_set
             )
 
-        def _annotation_width(anno_shaped):
-            """Shaped-block width in OUTPUT units — delegates to the
-            module-level `_shaped_width`."""
-            return _shaped_width(
-                anno_shaped, anno_scale_eff, anno_spacing_units
-            )
+        composer = _CharComposer(
+            base_glyph_set,
+            anno_glyph_set,
+            hb_font,
+            anno_glyph_order,
+            pen_glyph_set=output_glyph_set,
+            **composer_kwargs,
+        )
 
-        def _draw_annotation(pen, anno_shaped, x_start, y_offset):
-            """Draw a shaped annotation run — delegates to the
-            module-level `_draw_shaped`."""
-            _draw_shaped(
-                pen,
-                anno_shaped,
-                x_start,
-                y_offset,
-                anno_glyph_set,
-                anno_scale_eff,
-                anno_spacing_units,
+        # Batch builds: pick up the shaping / annotation-outline caches
+        # an earlier call with the same annotation font left behind.
+        # Both are keyed by annotation string within, so only the
+        # face, location and (for outlines) scale/spacing go outside.
+        if shared_state is not None:
+            composer.shape_cache = shared_state.setdefault(
+                ("shape", anno_digest, composer.anno_location_key), {}
             )
+            composer.anno_recordings = shared_state.setdefault(
+                (
+                    "anno_outline",
+                    anno_digest,
+                    composer.anno_location_key,
+                    anno_scale_eff,
+                    anno_spacing_units,
+                ),
+                {},
+            )
+        shape_cache_start = len(composer.shape_cache)
 
         # HarfBuzz font over the BASE font — built lazily, only when the
         # mapping actually contains word-unit (multi-char) entries.
@@ -639,10 +1482,7 @@ def generate_annotated_glyphs(
             elif mode == "basic":
                 components = _basic_components(base_char)
             else:
-                components = [
-                    get_glyph_name_by_char(base_font, c)
-                    for c in base_char
-                ]
+                components = [resolve_base(c) for c in base_char]
             if any(
                 not isinstance(g, str) or g == ".notdef"
                 for g in components
@@ -684,13 +1524,8 @@ def generate_annotated_glyphs(
                     cnt += 1
                     new_glyph_name = GLYPH_PREFIX + str(cnt).zfill(6)
 
-                anno_shaped = _shape_with(
-                    hb_font,
-                    anno_str,
-                    anno_glyph_order,
-                    anno_glyph_order_set,
-                )
-                anno_len = _annotation_width(anno_shaped)
+                anno_shaped = composer.shape_annotation(anno_str)
+                anno_len = composer.annotation_width(anno_shaped)
 
                 # If the annotation is wider than the word, widen the
                 # glyph's advance so it doesn't collide with its
@@ -726,8 +1561,9 @@ def generate_annotated_glyphs(
                         )
                         x_cursor += xadv * base_scale
 
-                _draw_annotation(
+                composer.draw_annotation(
                     pen,
+                    anno_str,
                     anno_shaped,
                     (total_advance - anno_len) / 2,
                     word_anno_y,
@@ -769,6 +1605,215 @@ def generate_annotated_glyphs(
                         for c in carets_unscaled
                     ]
 
+        with_bare = emit_bare_bases and bare_base_map is not None
+
+        def _add_helper_glyph(glyph, name):
+            """Store a --component-bases helper glyph under `name` (or
+            the next free ``wingfontanno*`` name when None) and return
+            the name used. Helpers are never drawn on their own, so
+            they get a zero advance."""
+            nonlocal cnt
+            if name is None:
+                name = f"{ANNO_PREFIX}{len(composer.anno_helpers):06d}"
+            while name in output_glyph_name_used:
+                cnt += 1
+                name = GLYPH_PREFIX + str(cnt).zfill(6)
+            glyph.recalcBounds(out_glyf)
+            out_glyf[name] = glyph
+            out_hmtx[name] = (0, getattr(glyph, "xMin", 0))
+            if out_vmtx is not None:
+                out_vmtx[name] = (units_per_em, 0)
+            output_glyph_name_used[name] = True
+            return name
+
+        def _single_char_glyph(base_char):
+            """Base glyph name for a single-char entry, or None when the
+            base font can't supply it."""
+            glyph_name = resolve_base(base_char)
+            if (
+                not isinstance(glyph_name, str)
+                or glyph_name not in base_glyph_order_set
+            ):
+                return None
+            return glyph_name
+
+        # ── Parallel / cached composition ────────────────────────────
+        # Compose every single-char entry up front — on worker processes
+        # when jobs > 1, and only the pairs the composition cache lacks
+        # when one is given; the loop below then consumes the results in
+        # mapping order instead of drawing, so naming is unchanged.
+        precomposed = None
+        worker_note = ""
+        use_pool = jobs > 1
+        if jobs > 1 and sys.platform == "emscripten":
+            print(
+                f"  ⚠ jobs={jobs} ignored: worker processes aren't "
+                f"available under Pyodide — composing serially."
+            )
+            use_pool = False
+        elif jobs > 1 and component_bases:
+            print(
+                f"  ⚠ jobs={jobs} ignored: --component-bases composes "
+                f"serially (helper glyphs are named as they're created)."
+            )
+            use_pool = False
+
+        cache = None
+        if composition_cache and component_bases:
+            print(
+                "  ⚠ composition cache ignored: --component-bases names "
+                "its helper glyphs during composition."
+            )
+        elif not component_bases and (
+            composition_cache or shared_state is not None
+        ):
+            if base_font_source is not None:
+                base_digest = _font_digest(base_font_source)
+            elif base_font_bytes is not None:
+                base_digest = _font_digest(base_font_bytes)
+            else:
+                import io as _io
+                _buf = _io.BytesIO()
+                base_font.save(_buf)
+                base_digest = _font_digest(_buf.getvalue())
+            bucket = _CompositionCache.digest((
+                base_digest,
+                tuple(sorted((base_axis_location or {}).items())),
+                anno_digest,
+                tuple(sorted(composer_kwargs.items())),
+            ))
+            buckets = (
+                shared_state.setdefault("composition", {})
+                if shared_state is not None else {}
+            )
+            # Re-inserted on every use, so the dict runs from least to
+            # most recently used bucket (runner.py keeps only the last).
+            cache = buckets.pop(bucket, None)
+            if cache is None:
+                cache = _CompositionCache(
+                    composition_cache, bucket, composition_cache_max_bytes
+                )
+            buckets[bucket] = cache
+            # Counts are per call; the entries carry over.
+            cache.hits = cache.misses = 0
+
+        if use_pool or cache is not None:
+            pool_chars = []
+            pool_items = []
+            for base_char, anno_strs_dict in mapping.items():
+                if len(base_char) > 1:
+                    continue
+                glyph_name = _single_char_glyph(base_char)
+                if glyph_name is None or glyph_name not in base_glyph_set:
+                    continue
+                advance, lsb = base_hmtx[glyph_name]
+                pool_chars.append(base_char)
+                pool_items.append(
+                    (glyph_name, advance, lsb, list(anno_strs_dict), with_bare)
+                )
+
+            # Narrow every item to the variants (and bare base) the
+            # cache doesn't hold; fully cached chars drop out.
+            cached = []
+            if cache is not None:
+                miss_chars = []
+                miss_items = []
+                for base_char, item in zip(pool_chars, pool_items):
+                    glyph_name, advance, lsb, anno_strs, want_bare = item
+                    variants = {s: cache.get(glyph_name, s) for s in anno_strs}
+                    bare = cache.get(glyph_name, None) if want_bare else None
+                    missing = [s for s, v in variants.items() if v is None]
+                    bare_missing = want_bare and bare is None
+                    cached.append((variants, bare))
+                    if missing or bare_missing:
+                        miss_chars.append(base_char)
+                        miss_items.append(
+                            (glyph_name, advance, lsb, missing, bare_missing)
+                        )
+            else:
+                miss_chars, miss_items = pool_chars, pool_items
+
+            pool_hits = pool_misses = 0
+            if use_pool and miss_items:
+                worker_base_bytes = None
+                if base_font_file is None:
+                    worker_base_bytes = base_font_bytes
+                    if worker_base_bytes is None:
+                        import io as _io
+                        _buf = _io.BytesIO()
+                        base_font.save(_buf)
+                        worker_base_bytes = _buf.getvalue()
+                miss_results, pool_hits, pool_misses = _compose_in_pool(
+                    miss_items,
+                    jobs,
+                    {
+                        "base_font_file": base_font_file,
+                        "base_font_bytes": worker_base_bytes,
+                        "anno_font_bytes": anno_font_bytes,
+                        "base_axis_location": base_axis_location,
+                        "anno_axis_location": anno_axis_location,
+                        "composer_kwargs": composer_kwargs,
+                    },
+                )
+                worker_note = f" on {jobs} worker processes"
+            elif cache is not None:
+                # Serial misses go through the same compiled-record form
+                # the workers return, which is what the cache stores.
+                miss_results = []
+                for glyph_name, advance, lsb, anno_strs, want_bare in miss_items:
+                    variants, bare = composer.compose_char(
+                        glyph_name, advance, lsb, anno_strs,
+                        with_bare=want_bare,
+                    )
+                    miss_results.append(
+                        (
+                            [(Glyph(g.compile(out_glyf)), v_lsb, y_range)
+                             for g, v_lsb, y_range in variants],
+                            None if bare is None
+                            else (Glyph(bare[0].compile(out_glyf)), bare[1]),
+                        )
+                    )
+
+            if cache is None:
+                if use_pool and miss_items:
+                    precomposed = dict(zip(pool_chars, miss_results))
+            else:
+                misses_by_char = dict(
+                    zip(miss_chars, zip(miss_items, miss_results))
+                )
+                precomposed = {}
+                for base_char, item, (variants, bare) in zip(
+                    pool_chars, pool_items, cached
+                ):
+                    glyph_name, _advance, _lsb, anno_strs, _want_bare = item
+                    miss = misses_by_char.get(base_char)
+                    if miss is not None:
+                        (_g, _a, _l, missing, bare_missing), (
+                            new_variants, new_bare
+                        ) = miss
+                        for anno_str, (g, v_lsb, y_range) in zip(
+                            missing, new_variants
+                        ):
+                            # Glyph(b"") (no ink) keeps no `.data`.
+                            value = (getattr(g, "data", b""), v_lsb, y_range)
+                            cache.put(glyph_name, anno_str, value)
+                            variants[anno_str] = value
+                        if bare_missing:
+                            bare = (
+                                getattr(new_bare[0], "data", b""), new_bare[1]
+                            )
+                            cache.put(glyph_name, None, bare)
+                    precomposed[base_char] = (
+                        [(Glyph(variants[s][0]), variants[s][1], variants[s][2])
+                         for s in anno_strs],
+                        None if bare is None else (Glyph(bare[0]), bare[1]),
+                    )
+                cache.store()
+                worker_note += (
+                    f", composition cache {cache.hits} hits / "
+                    f"{cache.misses} misses"
+                )
+
         for base_char, anno_strs_dict in mapping.items():
             # Multi-char keys are word-unit entries (Arabic / Thai —
             # see csv_parser.WORD_SCRIPTS); single chars take the
@@ -778,20 +1823,45 @@ def generate_annotated_glyphs(
                 continue
 
             # ──────────────────── single-char entries ────────────────────
-            glyph_name_raw = get_glyph_name_by_char(base_font, base_char)
-            if (
-                not isinstance(glyph_name_raw, str)
-                or glyph_name_raw not in base_glyph_order_set
-            ):
+            glyph_name = _single_char_glyph(base_char)
+            if glyph_name is None:
                 continue
-
-            glyph_name = glyph_name_raw
             processed_glyph_names.add(glyph_name)
 
             if glyph_name not in base_glyph_set:
                 continue
 
-            base_advance_width = base_hmtx[glyph_name][0]
+            base_advance_width, base_lsb = base_hmtx[glyph_name]
+
+            # Named up front: --component-bases may store the bare glyph
+            # during composition, as the base its variants reference.
+            bare_name = None
+            if with_bare and glyph_name not in bare_base_map:
+                bare_name = f"{BARE_PREFIX}{ord(base_char):06X}"
+                while bare_name in output_glyph_name_used:
+                    cnt += 1
+                    bare_name = GLYPH_PREFIX + str(cnt).zfill(6)
+
+            if precomposed is not None:
+                variants, bare = precomposed.pop(base_char)
+            elif component_bases:
+                variants, bare = composer.compose_char_components(
+                    glyph_name,
+                    base_advance_width,
+                    base_lsb,
+                    anno_strs_dict.keys(),
+                    bare_name=bare_name,
+                    base_helper_name=f"{BASE_PREFIX}{ord(base_char):06X}",
+                    add_helper=_add_helper_glyph,
+                )
+            else:
+                variants, bare = composer.compose_char(
+                    glyph_name,
+                    base_advance_width,
+                    base_lsb,
+                    anno_strs_dict.keys(),
+                    with_bare=bare_name is not None,
+                )
 
             for i, anno_str in enumerate(anno_strs_dict.keys()):
                 if i == 0:
@@ -805,70 +1875,22 @@ def generate_annotated_glyphs(
                     new_glyph_name = GLYPH_PREFIX + str(cnt).zfill(6)
                     cnt += 1
 
-                pen = TTGlyphPen(output_glyph_set)
-                _draw_decomposed(
-                    base_glyph_set,
-                    glyph_name,
-                    TransformPen(
-                        pen, (base_scale, 0, 0, base_scale, 0, base_y_offset)
-                    ),
-                )
+                composed_glyph, lsb, y_range = variants[i]
 
-                # Shape the annotation string with HarfBuzz — this
-                # applies the annotation font's GSUB rules (Indic
-                # reordering, Arabic positional forms, …) and GPOS
-                # positioning (mark-to-base anchors that put Thai
-                # vowels above their consonants, kerning, …), then
-                # draw the run centred over the scaled base. The
-                # shaping/layout mechanics are shared with the
-                # word-unit path — see _shape_with /
-                # _annotation_width / _draw_annotation above.
-                anno_shaped = _shape_with(
-                    hb_font,
-                    anno_str,
-                    anno_glyph_order,
-                    anno_glyph_order_set,
-                )
-                anno_len = _annotation_width(anno_shaped)
-                _draw_annotation(
-                    pen,
-                    anno_shaped,
-                    (base_advance_width * base_scale - anno_len) / 2,
-                    anno_y_offset,
-                )
-
-                if out_vmtx is not None and glyph_name in base_glyph_order_set:
+                if out_vmtx is not None:
                     out_vmtx[new_glyph_name] = base_font["vmtx"][glyph_name]
 
-                out_hmtx[new_glyph_name] = (
-                    base_advance_width,
-                    round(
-                        max(
-                            0,
-                            min(
-                                (base_advance_width * base_scale - anno_len) / 2,
-                                base_hmtx[glyph_name][1] * base_scale,
-                            )
-                            + (1 - base_scale) * base_advance_width / 2,
-                        )
-                    ),
-                )
-                composed_glyph = pen.glyph()
+                out_hmtx[new_glyph_name] = (base_advance_width, lsb)
                 # Track the composed glyph's ink extent so the caller can
                 # auto-fit the output ascent to the tallest annotation
-                # (see char_metrics in the docstring). TTGlyphPen emits a
-                # simple glyph with a flat `coordinates` array; empty for
-                # ink-less glyphs (skip those).
-                if char_metrics is not None:
-                    coords = getattr(composed_glyph, "coordinates", None)
-                    if coords is not None and len(coords):
-                        ys = [y for _x, y in coords]
-                        char_metrics["max_y"] = max(
-                            char_metrics.get("max_y", 0), max(ys)
-                        )
-                        char_metrics["min_y"] = min(
-                            char_metrics.get("min_y", 0), min(ys)
-                        )
+                # (see char_metrics in the docstring).
+                if char_metrics is not None and y_range is not None:
+                    char_metrics["max_y"] = max(
+                        char_metrics.get("max_y", 0), y_range[1]
+                    )
+                    char_metrics["min_y"] = min(
+                        char_metrics.get("min_y", 0), y_range[0]
+                    )
                 out_glyf[new_glyph_name] = composed_glyph
                 output_glyph_name_used[new_glyph_name] = True
                 mapping[base_char][anno_str] = (new_glyph_name, i)
@@ -885,34 +1907,11 @@ def generate_annotated_glyphs(
             # em-centred mark), and record default→bare for the strip
             # GSUB the manual path builds later. Gated so non-DIY builds
             # add nothing. One per base glyph (deduped on glyph_name).
-            if (
-                emit_bare_bases
-                and bare_base_map is not None
-                and glyph_name not in bare_base_map
-            ):
-                bare_name = f"{BARE_PREFIX}{ord(base_char):06X}"
-                while bare_name in output_glyph_name_used:
-                    cnt += 1
-                    bare_name = GLYPH_PREFIX + str(cnt).zfill(6)
-                bare_pen = TTGlyphPen(output_glyph_set)
-                # x-centre the scaled base (same effective placement the
-                # baked composite ends up at), so a DIY-annotated 行 sits
-                # at the same x as the automatic composite 行.
-                bare_x = (base_advance_width * (1 - base_scale)) / 2
-                _draw_decomposed(
-                    base_glyph_set,
-                    glyph_name,
-                    TransformPen(
-                        bare_pen,
-                        (base_scale, 0, 0, base_scale, bare_x, base_y_offset),
-                    ),
-                )
-                out_glyf[bare_name] = bare_pen.glyph()
-                out_hmtx[bare_name] = (
-                    base_advance_width,
-                    round(base_hmtx[glyph_name][1] * base_scale + bare_x),
-                )
-                if out_vmtx is not None and glyph_name in base_glyph_order_set:
+            if bare_name is not None:
+                bare_glyph, bare_lsb = bare
+                out_glyf[bare_name] = bare_glyph
+                out_hmtx[bare_name] = (base_advance_width, bare_lsb)
+                if out_vmtx is not None:
                     out_vmtx[bare_name] = base_font["vmtx"][glyph_name]
                 output_glyph_name_used[bare_name] = True
                 bare_base_map[glyph_name] = bare_name
@@ -930,10 +1929,98 @@ def generate_annotated_glyphs(
         # orders are already in sync).
         output_font.setGlyphOrder(output_font["glyf"].glyphOrder)
 
-        timer.note(f"{len(processed_glyph_names)} characters processed")
+        if precomposed is not None:
+            shape_hits = pool_hits + composer.shape_hits
+            shape_misses = (
+                pool_misses + len(composer.shape_cache) - shape_cache_start
+            )
+        else:
+            shape_hits = composer.shape_hits
+            shape_misses = len(composer.shape_cache) - shape_cache_start
+        timer.note(
+            f"{len(processed_glyph_names)} characters processed"
+            f"{worker_note}, annotation shaping {shape_hits} hits / "
+            f"{shape_misses} misses"
+        )
         return processed_glyph_names
 
 
+def _scale_simple_glyph(src, base_lsb, base_scale, x_offset, np=None):
+    """Scale a simple (contour-only) glyf glyph without going through
+    pens: ``x * base_scale + x_offset``, ``y * base_scale`` applied to
+    the whole coordinate array at once (vectorised when `np` — the
+    numpy module — is passed, a flat comprehension otherwise).
+
+    Reproduces the TTGlyphPen + TransformPen result exactly: the same
+    float arithmetic and otRound, the glyph set's shift of the outline
+    by ``hmtx lsb - xMin``, contours rotated to start at their
+    first on-curve point (that's how Glyph.draw replays them), flags
+    reduced to the on-curve bit, a closing point that repeats the start
+    dropped, and instructions dropped — the source hints don't survive
+    a rescale anyway. Returns None for glyphs it doesn't handle (cubic
+    or one-point contours), which keep the pen path."""
+    flags = src.flags
+    if any(f & flagCubic for f in flags):
+        return None
+    src_coords = src.coordinates
+    shift = base_lsb - src.xMin
+
+    order = []
+    end_pts = []
+    start = 0
+    for end in src.endPtsOfContours:
+        if end == start:
+            return None  # one-point contour: the pen path drops it
+        first_on = start
+        while first_on <= end and not flags[first_on] & flagOnCurve:
+            first_on += 1
+        if first_on > end:
+            # All off-curve: drawn in stored order.
+            contour = list(range(start, end + 1))
+            closing_line = True
+        else:
+            contour = list(range(first_on, end + 1))
+            contour.extend(range(start, first_on))
+            closing_line = flags[contour[-1]] & flagOnCurve
+        # TTGlyphPen.closePath drops a closing point that repeats the
+        # contour's first point.
+        if closing_line and src_coords[contour[0]] == src_coords[contour[-1]]:
+            contour.pop()
+        order.extend(contour)
+        end_pts.append(len(order) - 1)
+        start = end + 1
+
+    if np is not None:
+        xy = np.frombuffer(src.coordinates.array, dtype=np.float64)
+        xy = xy.reshape(-1, 2)[order]
+        xy[:, 0] += shift
+        xy *= base_scale
+        xy[:, 0] += x_offset
+        coordinates = GlyphCoordinates()
+        coordinates.array.frombytes(np.floor(xy + 0.5).tobytes())
+    else:
+        coordinates = GlyphCoordinates(
+            [
+                (
+                    otRound(
+                        (src_coords[k][0] + shift) * base_scale + x_offset
+                    ),
+                    otRound(src_coords[k][1] * base_scale),
+                )
+                for k in order
+            ]
+        )
+
+    glyph = Glyph()
+    glyph.numberOfContours = src.numberOfContours
+    glyph.endPtsOfContours = end_pts
+    glyph.flags = array("B", [flags[k] & flagOnCurve for k in order])
+    glyph.coordinates = coordinates
+    glyph.program = ttProgram.Program()
+    glyph.program.fromBytecode(b"")
+    return glyph
+
+
 def scale_glyphs(
     base_font,
     output_font,
@@ -977,8 +2064,25 @@ def scale_glyphs(
         out_hmtx = output_font["hmtx"]
         inv_base_scale = 1 - base_scale
 
+        # Pen-free path for simple glyphs (see _scale_simple_glyph) —
+        # one Python call per glyph instead of several per point, which
+        # is what dominates full (non -opt) builds over ~50k glyphs.
+        # Only valid when the outline comes straight from glyf: a still
+        # variable base sampled at an axis location has to interpolate
+        # through the glyph set. numpy is optional (not in
+        # requirements.txt; Pyodide only has it if loaded), the
+        # comprehension fallback gives identical output.
+        base_glyf = None
+        if not (base_axis_location and "fvar" in base_font):
+            base_glyf = base_font["glyf"]
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+
         skipped_no_outline: list[str] = []
         scaled_count = 0
+        fast_count = 0
 
         for glyph_name in glyph_names:
             if glyph_name in skip:
@@ -988,14 +2092,31 @@ def scale_glyphs(
                 continue
 
             base_advance_width, base_lsb = base_hmtx[glyph_name]
-            pen = TTGlyphPen(output_glyph_set)
             x_offset = (base_advance_width * inv_base_scale) / 2
-            tpen = TransformPen(
-                pen, (base_scale, 0, 0, base_scale, x_offset, 0)
-            )
-            base_glyph_set[glyph_name].draw(tpen)
+            scaled = None
+            if base_glyf is not None:
+                # Expand a copy, not the base's own glyph: under a batch
+                # or warm preview session the base outlives this build,
+                # and compiled glyphs are a fraction of the size.
+                src = base_glyf.glyphs[glyph_name]
+                if hasattr(src, "data"):
+                    src = Glyph(src.data)
+                    src.expand(base_glyf)
+                if src.numberOfContours > 0:
+                    scaled = _scale_simple_glyph(
+                        src, base_lsb, base_scale, x_offset, np
+                    )
+            if scaled is not None:
+                fast_count += 1
+            else:
+                pen = TTGlyphPen(output_glyph_set)
+                tpen = TransformPen(
+                    pen, (base_scale, 0, 0, base_scale, x_offset, 0)
+                )
+                base_glyph_set[glyph_name].draw(tpen)
+                scaled = pen.glyph()
 
-            out_glyf[glyph_name] = pen.glyph()
+            out_glyf[glyph_name] = scaled
             out_hmtx[glyph_name] = (
                 base_advance_width,
                 round(base_lsb * base_scale + x_offset),
@@ -1003,7 +2124,8 @@ def scale_glyphs(
             scaled_count += 1
 
         timer.note(
-            f"{scaled_count} scaled, {len(skipped_no_outline)} skipped no-outline"
+            f"{scaled_count} scaled ({fast_count} pen-free), "
+            f"{len(skipped_no_outline)} skipped no-outline"
         )
         return scaled_count, skipped_no_outline
 
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+build_matrix.py — run the whole font build matrix on one machine.
+
+The deploy-pages workflow builds its fonts as a GitHub Actions
+matrix, one runner per font. This script reproduces that matrix
+locally: every entry runs as its own `wing-font.py` process, up to
+`--jobs` at a time, so one large box can replace the parallel runners.
+
+Scheduling
+----------
+
+Builds start longest-first. A build's cost is estimated from the size
+of its mapping CSV (plus its DIY inventory) and of its base font, so the
+big Mandarin and Cantonese mappings start while the short ones fill the
+gaps behind them. That ordering is what keeps the makespan (the time
+until the last build finishes) close to the longest single build.
+
+Concurrency is also capped by memory. Each build's peak RSS is estimated
+from its input font sizes, and a build only starts when the estimates
+of everything running, plus its own, fit under `--max-memory`. With
+nothing running, a build always starts, even if its estimate alone is
+over the limit.
+
+A previous report at the `--report` path replaces these estimates with
+the durations and peak RSS measured last time, so later runs schedule
+from real numbers.
+
+Report
+------
+
+Each build's output goes to `OUTPUT_DIR/logs/NAME.log`. When the run
+ends, the wall time, peak RSS, exit status and estimates of every build
+are printed as a table and written as JSON to `--report`. A build is
+ok only if it exits 0 AND writes `OUTPUT_DIR/NAME.ttf`; only ok builds
+seed the next run's estimates.
+
+Usage
+-----
+
+    python build_matrix.py ../.github/workflows/deploy-pages.yml --jobs 8
+    python build_matrix.py builds.json --max-memory 48 --output-dir outputs
+
+The matrix is either the workflow file itself (its
+`- { name: ..., args: "..." }` lines) or a JSON list of
+`{"name": ..., "args": ...}` entries, the `wing-font.py batch` manifest
+format. Run from python/, like the workflow does: the args' paths are
+relative to it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+# `- { name: X, args: "..." }` — the flow-style entries under the
+# workflow's `matrix.font` key. Commented-out entries never match
+# because the line must start with the dash.
+_MATRIX_LINE = re.compile(
+    r'^\s*-\s*\{\s*name:\s*([^,\s]+)\s*,\s*args:\s*"((?:[^"\\]|\\.)*)"\s*\}'
+)
+
+# Peak RSS estimate per MB of input font, from the local matrix: a CJK
+# base is decompiled (its outlines shared with the output font) and
+# recorded during composition, while the annotation font is only
+# shaped and drawn from. Deliberately generous. A measured report
+# replaces these.
+_RSS_MB_PER_BASE_MB = 40
+_RSS_MB_PER_ANNO_MB = 8
+_RSS_MB_FLOOR = 300
+
+# Relative cost weights for the duration estimate. Only the ORDER
+# matters for longest-first scheduling, so these are unitless.
+_COST_PER_MAPPING_MB = 10.0
+_COST_PER_BASE_MB = 1.0
+
+
+def load_matrix(path):
+    """``[(name, args), ...]`` from a workflow file or JSON manifest."""
+    text = Path(path).read_text(encoding="utf-8")
+    if str(path).endswith((".yml", ".yaml")):
+        entries = []
+        for line in text.splitlines():
+            m = _MATRIX_LINE.match(line)
+            if m:
+                entries.append((m.group(1), m.group(2).replace('\\"', '"')))
+        return entries
+    return [(e["name"], e.get("args", "")) for e in json.loads(text)]
+
+
+def _arg(tokens, *flags):
+    """Value following the first of `flags` in `tokens`, or None."""
+    for i, token in enumerate(tokens[:-1]):
+        if token in flags:
+            return tokens[i + 1]
+    return None
+
+
+def _size_mb(path):
+    """Size of `path` (relative to python/, like the args) in MiB."""
+    if path is None:
+        return 0.0
+    try:
+        return os.path.getsize(HERE / path) / (1 << 20)
+    except OSError:
+        return 0.0
+
+
+class Build:
+    """One matrix entry: its command line and scheduling estimates."""
+
+    def __init__(self, name, args, output_dir, history):
+        self.name = name
+        tokens = shlex.split(args)
+        self.command = [
+            sys.executable, str(HERE / "wing-font.py"), *tokens,
+            "-f", name, "-o", str(Path(output_dir) / name),
+        ]
+        base_mb = _size_mb(_arg(tokens, "-i", "--base-font-file"))
+        anno_mb = _size_mb(_arg(tokens, "-a", "--anno-font_file"))
+        mapping_mb = _size_mb(_arg(tokens, "-m", "--mapping")) + _size_mb(
+            _arg(tokens, "--diy-annotations")
+        )
+        self.est_cost = (
+            mapping_mb * _COST_PER_MAPPING_MB + base_mb * _COST_PER_BASE_MB
+        )
+        self.est_rss_mb = max(
+            _RSS_MB_FLOOR,
+            base_mb * _RSS_MB_PER_BASE_MB + anno_mb * _RSS_MB_PER_ANNO_MB,
+        )
+        previous = history.get(name)
+        if previous and previous.get("ok", previous.get("returncode") == 0):
+            self.est_cost = previous["seconds"]
+            self.est_rss_mb = previous["max_rss_mb"]
+        self.log_path = Path(output_dir) / "logs" / f"{name}.log"
+        self.ttf_path = Path(output_dir) / f"{name}.ttf"
+        self.start = None
+        self.seconds = None
+        self.max_rss_mb = None
+        self.returncode = None
+        # Exit 0 AND a freshly written font; see run().
+        self.ok = None
+
+    def report(self):
+        return {
+            "name": self.name,
+            "seconds": round(self.seconds, 1),
+            "max_rss_mb": round(self.max_rss_mb, 1),
+            "returncode": self.returncode,
+            "ok": self.ok,
+            "est_cost": round(self.est_cost, 1),
+            "est_rss_mb": round(self.est_rss_mb, 1),
+        }
+
+
+def _default_max_memory_gb():
+    """75% of physical memory, or 8 GiB where that can't be read."""
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (ValueError, OSError, AttributeError):
+        return 8.0
+    return total * 0.75 / (1 << 30)
+
+
+def _rss_mb(rusage):
+    # ru_maxrss is KiB on Linux, bytes on macOS.
+    if sys.platform == "darwin":
+        return rusage.ru_maxrss / (1 << 20)
+    return rusage.ru_maxrss / 1024
+
+
+def _mtime_ns(path):
+    """`path`'s modification time in ns, or None if it doesn't exist."""
+    try:
+        return path.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def run(builds, jobs, max_memory_mb):
+    """Run `builds` longest-first under the job and memory caps. Fills
+    each build's measured fields in place."""
+    pending = sorted(builds, key=lambda b: b.est_cost, reverse=True)
+    running: dict = {}  # pid -> (Build, Popen, log file)
+    ttf_before: dict = {}  # Build.name -> TTF mtime when it started
+    done = 0
+    while pending or running:
+        in_use = sum(b.est_rss_mb for b, _p, _f in running.values())
+        started = False
+        if len(running) < jobs:
+            for build in pending:
+                if running and in_use + build.est_rss_mb > max_memory_mb:
+                    continue
+                pending.remove(build)
+                build.log_path.parent.mkdir(parents=True, exist_ok=True)
+                log = open(build.log_path, "wb")
+                ttf_before[build.name] = _mtime_ns(build.ttf_path)
+                build.start = time.perf_counter()
+                proc = subprocess.Popen(
+                    build.command,
+                    cwd=HERE,
+                    stdout=log,
+                    stderr=subprocess.STDOUT,
+                )
+                running[proc.pid] = (build, proc, log)
+                print(
+                    f"[matrix] start {build.name} "
+                    f"(est. {build.est_rss_mb:,.0f} MB, "
+                    f"{len(running)} running)"
+                )
+                started = True
+                break
+        if started:
+            continue
+
+        # Nothing (more) fits right now: reap one child. os.wait4
+        # returns that child's own rusage, which is where its peak RSS
+        # comes from.
+        pid, status, rusage = os.wait4(-1, 0)
+        if pid not in running:
+            continue
+        build, proc, log = running.pop(pid)
+        log.close()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        build.seconds = time.perf_counter() - build.start
+        build.max_rss_mb = _rss_mb(rusage)
+        build.returncode = proc.returncode
+        # Exit 0 isn't enough on its own (an argument error used to
+        # exit 0 too): the build must also have written its font, or
+        # its seconds and RSS would seed the next run's estimates.
+        ttf_after = _mtime_ns(build.ttf_path)
+        wrote_ttf = ttf_after is not None and (
+            ttf_after != ttf_before[build.name]
+        )
+        build.ok = build.returncode == 0 and wrote_ttf
+        done += 1
+        if build.ok:
+            status_text = "ok"
+        elif build.returncode == 0:
+            status_text = (
+                f"FAILED (exit 0 but no {build.ttf_path.name} written), "
+                f"see {build.log_path}"
+            )
+        else:
+            status_text = f"FAILED ({build.returncode}), see {build.log_path}"
+        print(
+            f"[matrix] ({done}/{len(builds)}) {build.name}: "
+            f"{build.seconds:.1f}s, {build.max_rss_mb:,.0f} MB — "
+            f"{status_text}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the wing-font build matrix on a local process pool.",
+    )
+    parser.add_argument(
+        "matrix",
+        help="deploy-pages.yml, or a JSON list of {name, args} builds",
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1,
+        help="Concurrent builds. Default: CPU count",
+    )
+    parser.add_argument(
+        "--max-memory", type=float, default=None, metavar="GB",
+        help="Cap on the summed RSS estimates of running builds. "
+             "Default: 75%% of physical memory",
+    )
+    parser.add_argument(
+        "--output-dir", default="outputs",
+        help="Where fonts and logs go (relative to python/). "
+             "Default: outputs",
+    )
+    parser.add_argument(
+        "--report", default=None,
+        help="JSON report path; an existing report seeds the estimates. "
+             "Default: OUTPUT_DIR/matrix-report.json",
+    )
+    parser.add_argument(
+        "--only", action="append", default=[], metavar="NAME",
+        help="Build only these entries (repeatable)",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error(f"--jobs expects a positive integer; got {args.jobs}")
+
+    output_dir = HERE / args.output_dir
+    report_path = Path(args.report) if args.report else (
+        output_dir / "matrix-report.json"
+    )
+    history = {}
+    if report_path.exists():
+        try:
+            history = {
+                e["name"]: e
+                for e in json.loads(report_path.read_text())["builds"]
+            }
+        except (OSError, ValueError, KeyError, TypeError):
+            history = {}
+
+    entries = load_matrix(args.matrix)
+    if args.only:
+        entries = [(n, a) for n, a in entries if n in args.only]
+    if not entries:
+        print(f"[matrix] no builds found in {args.matrix}")
+        return 1
+    builds = [Build(n, a, output_dir, history) for n, a in entries]
+
+    max_memory_gb = args.max_memory or _default_max_memory_gb()
+    print(
+        f"[matrix] {len(builds)} builds, {args.jobs} jobs, "
+        f"{max_memory_gb:.1f} GB memory cap"
+    )
+    start = time.perf_counter()
+    run(builds, args.jobs, max_memory_gb * 1024)
+    wall = time.perf_counter() - start
+
+    builds.sort(key=lambda b: b.seconds, reverse=True)
+    print(f"\n{'build':40s} {'time':>8s} {'peak RSS':>10s}  status")
+    for b in builds:
+        if b.ok:
+            status = "ok"
+        elif b.returncode == 0:
+            status = "no output"
+        else:
+            status = f"exit {b.returncode}"
+        print(
+            f"{b.name:40s} {b.seconds:7.1f}s {b.max_rss_mb:8,.0f} MB  {status}"
+        )
+    failed = [b.name for b in builds if not b.ok]
+    serial = sum(b.seconds for b in builds)
+    print(
+        f"\nwall {wall:.1f}s for {serial:.1f}s of builds "
+        f"({serial / wall if wall else 0:.1f}x), {len(failed)} failed"
+    )
+
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps({
+        "wall_seconds": round(wall, 1),
+        "jobs": args.jobs,
+        "max_memory_gb": round(max_memory_gb, 1),
+        "builds": [b.report() for b in builds],
+    }, indent=2) + "\n")
+    print(f"[matrix] report: {report_path}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -130,13 +130,15 @@ We still keep ownership of:
     attribute to write ``SubstLookupRecord.LookupListIndex`` correctly.
 """
 
+from collections import Counter
+
 from fontTools.otlLib.builder import (
     ChainContextSubstBuilder,
     ChainContextualRule,
     SingleSubstBuilder,
 )
 from utils import (
-    get_glyph_name_by_char,
+    glyph_resolver,
     maybe_wrap_lookup_in_extension,
     register_feature_lookup,
     step_timer,
@@ -175,6 +177,139 @@ from utils import (
 # 5-10× on the 100K-rule mappings we tested.
 RULES_PER_SUBTABLE = 500
 
+# A class group needs at least this many compounds that share one rule
+# shape before buildChainSub folds them into a single class/coverage
+# rule. Each folded group gets a subtable of its own, and HarfBuzz
+# walks every subtable of the lookup at each glyph position. Small
+# groups therefore save bytes but cost shaping time. The table below
+# comes from mandarin-cn (39k pass-2 rules). It compares the compiled
+# GSUB size with hb.shape time over the whole word list:
+#
+#   threshold   GSUB bytes   brotli   shaping
+#   (none)        543,026   233,766   0.143 s
+#   8             494,510   217,208   0.168 s
+#   16            507,116   222,135   0.143 s
+#   32            514,882   226,545   0.141 s
+#
+# 16 is the smallest group size that leaves shaping time flat.
+CLASS_GROUP_MIN_RULES = 16
+
+
+def _append_partitioned_rules(chain_builder, rules, glyph_id, break_counter=0):
+    """
+    Append single-glyph-sequence ``rules`` to ``chain_builder``, cut
+    into subtables by first glyph. Returns the next unused
+    subtable-break counter.
+
+    A rule can only match where the buffer holds its first glyph, so
+    rules with different first glyphs never compete. That makes it
+    safe to regroup them by first glyph (ordered by glyph ID) as long
+    as rules sharing a first glyph keep their mapping order, and with
+    it the longest-match priority csv_parser sorted in. Subtables are
+    then cut at first-glyph boundaries once RULES_PER_SUBTABLE is
+    reached. Only a first glyph whose own rules exceed the budget is
+    split, and its pieces stay adjacent and in order.
+
+    Cutting by insertion count instead scattered a common leading
+    glyph over dozens of subtables. The shaper probed each of them.
+    With first-glyph partitioning every leading glyph lives in one
+    subtable. Each subtable covers a narrow glyph-ID range, which
+    HarfBuzz's per-subtable digest rejects cheaply.
+    """
+    by_first_glyph: dict = {}
+    for rule in rules:
+        by_first_glyph.setdefault(rule.glyphs[0][0], []).append(rule)
+
+    current: list = []
+    for first_glyph in sorted(by_first_glyph, key=glyph_id):
+        bucket = by_first_glyph[first_glyph]
+        if current and len(current) + len(bucket) > RULES_PER_SUBTABLE:
+            chain_builder.rules.extend(current)
+            chain_builder.add_subtable_break(break_counter)
+            break_counter += 1
+            current = []
+        current.extend(bucket)
+        while len(current) > RULES_PER_SUBTABLE:
+            chain_builder.rules.extend(current[:RULES_PER_SUBTABLE])
+            chain_builder.add_subtable_break(break_counter)
+            break_counter += 1
+            current = current[RULES_PER_SUBTABLE:]
+    chain_builder.rules.extend(current)
+    return break_counter
+
+
+def _partition_class_groups(entries):
+    """
+    Split pass-2 rule entries into class groups and single rules.
+
+    ``entries`` is the priority-ordered list of
+    ``(input_glyphs, per_position_variant)`` tuples collected by
+    buildChainSub. A class group is a set of compounds that:
+
+      * have the same length and the same variant pattern, and
+      * differ in exactly one position, which is not the first.
+
+    Each group folds into one rule. At the differing position, the
+    rule takes the union of the members' glyphs as its glyph set.
+    fontTools then encodes that rule as a format 2 or format 3
+    subtable, whichever compiles smaller. That takes about a third of
+    the bytes of one format 1 rule per compound.
+
+    A compound is eligible only if it shares no prefix with another
+    entry (an identical sequence counts). Two sequence rules can compete at the same position only
+    if one's input is a prefix of the other's. A prefix-free rule
+    therefore matches the same text wherever it sits in the lookup,
+    so a folded group can live in its own subtable without changing
+    which rule wins.
+
+    The differing position is never the first one. A subtable whose
+    first coverage holds a single glyph is skipped by the shaper at
+    almost every position. A first coverage with many glyphs is
+    tested everywhere, and that showed up as measurable shaping cost.
+
+    Returns ``(groups, singles)``:
+
+      * ``groups`` is a list of ``(glyph_sets, per_position_variant)``
+        pairs, with one glyph list per position.
+      * ``singles`` holds the remaining entries, in their original
+        order.
+    """
+    # Counted rather than collected: two words can resolve to the same
+    # glyph sequence, and then only the first of them may ever match.
+    sequences = Counter(glyphs for glyphs, _ in entries)
+    proper_prefixes = {
+        glyphs[:n] for glyphs in sequences for n in range(2, len(glyphs))
+    }
+    candidates: dict = {}
+    for i, (glyphs, variants) in enumerate(entries):
+        if sequences[glyphs] > 1 or glyphs in proper_prefixes or any(
+            glyphs[:n] in sequences for n in range(2, len(glyphs))
+        ):
+            continue
+        for pos in range(1, len(glyphs)):
+            key = (variants, pos, glyphs[:pos], glyphs[pos + 1:])
+            candidates.setdefault(key, []).append(i)
+
+    # Visit the largest groups first. The sort is stable, so ties stay
+    # in mapping order and the output is reproducible. An entry joins
+    # at most one group: the largest one it belongs to.
+    taken: set = set()
+    groups = []
+    for key in sorted(candidates, key=lambda k: len(candidates[k]), reverse=True):
+        members = [i for i in candidates[key] if i not in taken]
+        if len(members) < CLASS_GROUP_MIN_RULES:
+            continue
+        taken.update(members)
+        variants, pos, head, tail = key
+        glyph_sets = (
+            [[g] for g in head]
+            + [[entries[i][0][pos] for i in members]]
+            + [[g] for g in tail]
+        )
+        groups.append((glyph_sets, variants))
+    singles = [entry for i, entry in enumerate(entries) if i not in taken]
+    return groups, singles
+
 
 def buildChainSub(output_font, word_mapping, char_mapping):
     """
@@ -210,6 +345,7 @@ def buildChainSub(output_font, word_mapping, char_mapping):
         # getGlyphOrder() they're O(n). With 50k glyphs and a long
         # word_mapping iteration this is a free win.
         glyph_order_set = set(glyph_order)
+        resolve = glyph_resolver(output_font).glyph_name
 
         # One SingleSubst lookup per variant index actually seen in
         # the mapping. Stored as a dict so we can grow it on demand
@@ -230,18 +366,10 @@ def buildChainSub(output_font, word_mapping, char_mapping):
                 single_sub_builders[variant] = b
             return b
 
-        chain_builder = ChainContextSubstBuilder(output_font, None)
-
-        # Counts only the *real* rules appended (subtable breaks don't
-        # count toward the per-subtable budget).
-        rules_in_current_subtable = 0
-
-        # add_subtable_break() appends a sentinel ChainContextualRule to
-        # self.rules. ChainContextSubstBuilder's `rules` is a list (not
-        # a dict), so collisions aren't an issue — each call appends a
-        # fresh sentinel — but we still pass a counter so subtable
-        # breaks in stack traces are easy to identify by source order.
-        subtable_break_counter = 0
+        # (input_glyphs, per_position_variant) per buildable word, in
+        # mapping priority order. Collected first and turned into rules
+        # after the loop, once _partition_class_groups has seen them all.
+        entries = []
 
         # Iterate words in their incoming order. csv_parser already
         # sorted them (longer/higher-weighted entries first), so we
@@ -270,7 +398,7 @@ def buildChainSub(output_font, word_mapping, char_mapping):
             is_buildable = True
 
             for i, char in enumerate(word):
-                glyph_name = get_glyph_name_by_char(output_font, char)
+                glyph_name = resolve(char)
                 if not isinstance(glyph_name, str) or glyph_name not in glyph_order_set:
                     # Word references a character not in the font — skip
                     # the whole rule rather than emitting a partial chain.
@@ -315,36 +443,51 @@ def buildChainSub(output_font, word_mapping, char_mapping):
             if not any(v is not None and v > 0 for v in per_position_variant):
                 continue
 
-            # Build rule_lookups, treating variant-0 positions as
-            # passthroughs (None) so the shaper skips them and so the
-            # subset closure has fewer references to chase.
-            # Every v > 0 here was registered by the loop above
-            # (`_get_builder(variant)`), so dict lookup is safe
-            # without a default. v == 0 / v is None go to the
-            # passthrough branch.
-            rule_lookups = [
-                [single_sub_builders[v]] if v is not None and v > 0 else None
-                for v in per_position_variant
-            ]
-            chain_builder.rules.append(
-                ChainContextualRule(
-                    prefix=[],
-                    glyphs=[[g] for g in input_glyphs],
-                    suffix=[],
-                    lookups=rule_lookups,
-                )
+            # Variant-0 positions become passthroughs (None) so the
+            # shaper skips them and so the subset closure has fewer
+            # references to chase.
+            entries.append((
+                tuple(input_glyphs),
+                tuple(v if v else None for v in per_position_variant),
+            ))
+
+        chain_builder = ChainContextSubstBuilder(output_font, None)
+
+        def _rule(glyph_sets, per_position_variant):
+            # Every non-None variant here was registered by the loop
+            # above (`_get_builder(variant)`), so dict lookup is safe
+            # without a default.
+            return ChainContextualRule(
+                prefix=[],
+                glyphs=glyph_sets,
+                suffix=[],
+                lookups=[
+                    [single_sub_builders[v]] if v is not None else None
+                    for v in per_position_variant
+                ],
             )
-            rules_in_current_subtable += 1
-
-            # Force a subtable boundary every RULES_PER_SUBTABLE rules
-            # so we never let any single subtable approach the 64KB
-            # OpenType offset limit. The builder honours these breaks
-            # when it composes the final lookup
-            # (see ChainContextualBuilder.rulesets()).
-            if rules_in_current_subtable >= RULES_PER_SUBTABLE:
-                chain_builder.add_subtable_break(subtable_break_counter)
-                subtable_break_counter += 1
-                rules_in_current_subtable = 0
+
+        groups, singles = _partition_class_groups(entries)
+
+        subtable_break_counter = _append_partitioned_rules(
+            chain_builder,
+            [
+                _rule([[g] for g in input_glyphs], per_position_variant)
+                for input_glyphs, per_position_variant in singles
+            ],
+            output_font.getGlyphID,
+        )
+
+        # Each class group gets a subtable of its own: a subtable whose
+        # rules use glyph classes can only be format 2 or 3, and the
+        # builder keeps whichever compiles smaller. Appending groups
+        # after the single rules doesn't change which rule wins,
+        # because group members are prefix-free (see
+        # _partition_class_groups).
+        for glyph_sets, per_position_variant in groups:
+            chain_builder.add_subtable_break(subtable_break_counter)
+            subtable_break_counter += 1
+            chain_builder.rules.append(_rule(glyph_sets, per_position_variant))
 
         # --- Append SingleSubst lookups; record indices ----------------
         # Order is critical: the chain context lookup we're about to
@@ -398,7 +541,11 @@ def buildChainSub(output_font, word_mapping, char_mapping):
         # `calt`" for the iWork-suppression rationale. Same lookup body,
         # different feature tag.
         register_feature_lookup(gsub, "ccmp", chain_index)
-        timer.note(f"{len(chain_builder.rules)} rules")
+        grouped = len(entries) - len(singles)
+        timer.note(
+            f"{len(entries)} rules"
+            + (f", {grouped} in {len(groups)} class groups" if groups else "")
+        )
 
 
 # Fullwidth digit codepoint base: U+FF10 = FULLWIDTH DIGIT ZERO. Mirrors
@@ -418,9 +565,10 @@ def _resolve_digit_glyphs(font, *, fullwidth: bool):
     glyph.
     """
     base = _FULLWIDTH_DIGIT_BASE if fullwidth else ord("0")
+    resolve = glyph_resolver(font).glyph_name
     glyphs = {}
     for value in range(1, 10):
-        name = get_glyph_name_by_char(font, chr(base + value))
+        name = resolve(chr(base + value))
         if name:
             glyphs[value] = name
     return glyphs
@@ -494,6 +642,7 @@ def buildChainSubVariantOverrides(
 
         gsub = output_font["GSUB"].table
         glyph_order_set = set(output_font.getGlyphOrder())
+        resolve = glyph_resolver(output_font).glyph_name
 
         if invisible_glyph not in glyph_order_set:
             # ensure_invisible_glyph hit its CFF fallback (no glyf
@@ -534,8 +683,7 @@ def buildChainSubVariantOverrides(
             digit_eater_builder.mapping[glyph] = invisible_glyph
 
         chain_builder = ChainContextSubstBuilder(output_font, None)
-        rules_in_current_subtable = 0
-        subtable_break_counter = 0
+        override_rules = []
 
         for word, variants in word_mapping.items():
             if len(word) <= 1 or len(variants) < 2:
@@ -547,7 +695,7 @@ def buildChainSubVariantOverrides(
             input_glyphs = []
             buildable = True
             for char in word:
-                glyph_name = get_glyph_name_by_char(output_font, char)
+                glyph_name = resolve(char)
                 if not isinstance(glyph_name, str) or glyph_name not in glyph_order_set:
                     buildable = False
                     break
@@ -617,7 +765,7 @@ def buildChainSubVariantOverrides(
                     if not digit_glyph:
                         continue
                     chain_input = [[g] for g in input_glyphs] + [[digit_glyph]]
-                    chain_builder.rules.append(
+                    override_rules.append(
                         ChainContextualRule(
                             prefix=[],
                             glyphs=chain_input,
@@ -625,12 +773,10 @@ def buildChainSubVariantOverrides(
                             lookups=rule_lookups,
                         )
                     )
-                    rules_in_current_subtable += 1
 
-                if rules_in_current_subtable >= RULES_PER_SUBTABLE:
-                    chain_builder.add_subtable_break(subtable_break_counter)
-                    subtable_break_counter += 1
-                    rules_in_current_subtable = 0
+        _append_partitioned_rules(
+            chain_builder, override_rules, output_font.getGlyphID
+        )
 
         # --- Append SingleSubst lookups; record indices ----------------
         # Same ordering contract as pass 2: append → assign
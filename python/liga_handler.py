@@ -105,7 +105,7 @@ from typing import Dict, Tuple
 
 from fontTools.otlLib.builder import LigatureSubstBuilder
 
-from utils import get_glyph_name_by_char, register_feature_lookup, step_timer
+from utils import glyph_resolver, register_feature_lookup, step_timer
 
 # Chinese numeral fallback. When typing Latin digits is inconvenient, the
 # user can type 字 + <trigger> + 一/二/三/... to pick a variant. The
@@ -199,6 +199,7 @@ def buildLiga(
     """
     with step_timer("ligature substitution") as timer:
         gsub = output_font["GSUB"].table
+        resolve = glyph_resolver(output_font).glyph_name
 
         digit_glyphs = _resolve_digits(output_font)
         # Parallel fullwidth-digit path. Empirically, DirectWrite's
@@ -220,7 +221,7 @@ def buildLiga(
         # honour the digit-suffix rules in that case so the user can
         # always override via the universal Latin-digit path.
         trigger_glyph = (
-            get_glyph_name_by_char(output_font, trigger_char)
+            resolve(trigger_char)
             if trigger_char
             else None
         )
@@ -259,7 +260,7 @@ def buildLiga(
             # run split after Arabic text anyway).
             if len(original_char) != 1:
                 continue
-            default_glyph_name = get_glyph_name_by_char(output_font, original_char)
+            default_glyph_name = resolve(original_char)
             if not default_glyph_name:
                 continue
 
@@ -359,9 +360,10 @@ def buildLiga(
 
 def _resolve_digits(font) -> Dict[int, str]:
     """Resolve the glyph names for ASCII digits 0–9, skipping any missing."""
+    resolve = glyph_resolver(font).glyph_name
     glyphs: Dict[int, str] = {}
     for i in range(10):
-        name = get_glyph_name_by_char(font, str(i))
+        name = resolve(str(i))
         if name:
             glyphs[i] = name
     if not glyphs:
@@ -383,10 +385,11 @@ def _resolve_fullwidth_digits(font) -> Dict[int, str]:
     fonts that don't carry the fullwidth glyphs (mostly non-CJK
     annotation fonts that we don't ship as base fonts anyway).
     """
+    resolve = glyph_resolver(font).glyph_name
     glyphs: Dict[int, str] = {}
     for i in range(10):
         ch = chr(_FULLWIDTH_DIGIT_BASE + i)
-        name = get_glyph_name_by_char(font, ch)
+        name = resolve(ch)
         if name:
             glyphs[i] = name
     if not glyphs:
@@ -399,9 +402,10 @@ def _resolve_fullwidth_digits(font) -> Dict[int, str]:
 
 def _resolve_chinese_numerals(font) -> Dict[int, str]:
     """Resolve glyph names for 零..九, skipping any missing."""
+    resolve = glyph_resolver(font).glyph_name
     glyphs: Dict[int, str] = {}
     for idx, ch in enumerate(_CHINESE_NUMERALS):
-        name = get_glyph_name_by_char(font, ch)
+        name = resolve(ch)
         if name:
             glyphs[idx] = name
     if not glyphs:
@@ -1,6 +1,7 @@
 # csv_parser.py: load_mapping 函數的最終更正版 (支援來源追蹤)
 
 import csv
+import os
 from collections import defaultdict
 from typing import NamedTuple
 import re
@@ -222,55 +223,235 @@ def get_tone(anno_str):
         return int(match.group(1))
     return 5 # 輕聲或無聲調，給予預設值以便排序
 
-def _find_problematic_entries(csv_file, cmap, char, discarded_annos_set):
+def _find_problematic_entries(rows, cmap, chars):
     """
-    Lazily re-scan the CSV to find which entries (single-char rows or
-    multi-char phrases) used the pronunciations being dropped for
-    ``char``. Replaces a full in-memory copy of every CSV row that we
-    used to maintain just to power this rare-branch diagnostic.
-
-    Returns ``dict[anno -> set[base_chars]]`` — the phrases / chars
-    whose annotation matches a discarded reading. Capped via the
-    caller's display logic, not here.
+    Reverse index for the MAX_CHAR_VARIANTS diagnostic: which entries
+    (single-char rows or multi-char phrases) used each reading of the
+    characters in ``chars``. One pass over the parsed rows covers every
+    overflowing character at once, instead of one CSV re-scan each.
+
+    Returns ``dict[char -> dict[anno -> set[base_chars]]]``. Capped via
+    the caller's display logic, not here.
     """
-    problematic = defaultdict(set)
-    try:
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            for row in csv.reader(f):
-                if len(row) < 2:
-                    continue
-                base_chars = row[0]
-                # Word-unit rows: the whole second column is one
-                # annotation keyed by the full word (mirrors the main
-                # loop's routing).
-                if is_word_unit_word(base_chars):
-                    if (
-                        base_chars == char
-                        and row[1].strip() in discarded_annos_set
-                    ):
-                        problematic[row[1].strip()].add(base_chars)
-                    continue
-                anno_strs = row[1].split(' ')
-                if len(base_chars) != len(anno_strs):
-                    continue
-                # Same filter the main loop applies — skip rows with
-                # uncovered chars so the diagnostic matches what
-                # actually went into char_cnt.
-                if any(ord(c) not in cmap for c in base_chars):
-                    continue
-                for i, c in enumerate(base_chars):
-                    if c == char and anno_strs[i] in discarded_annos_set:
-                        problematic[anno_strs[i]].add(base_chars)
-    except OSError:
-        # Best-effort diagnostic: if re-opening the CSV fails we just
-        # produce an empty source attribution rather than crashing
-        # the whole pipeline.
-        pass
+    problematic = {char: defaultdict(set) for char in chars}
+    for base_chars, annos, _, _ in rows:
+        if annos is None:
+            continue
+        # Word-unit rows: the whole annotation is keyed by the full
+        # word (mirrors _build_mapping's routing).
+        if isinstance(annos, str):
+            if base_chars not in problematic:
+                continue
+        elif problematic.keys().isdisjoint(base_chars):
+            continue
+        # Same filter the main loop applies — skip rows with uncovered
+        # chars so the diagnostic matches what actually went into
+        # char_cnt.
+        if cmap is not None and any(ord(c) not in cmap for c in base_chars):
+            continue
+        if isinstance(annos, str):
+            problematic[base_chars][annos].add(base_chars)
+            continue
+        for c, anno_str in zip(base_chars, annos):
+            if c in problematic:
+                problematic[c][anno_str].add(base_chars)
     return problematic
 
 
-def load_mapping(font, csv_file):
+# --- On-disk parse cache ------------------------------------------------
+#
+# Parsing a 137k-row mapping (csv.reader + per-row script detection) and
+# ranking its readings costs seconds, and the deploy matrix builds the
+# same CSV against several base fonts. With a cache directory,
+# load_mapping stores everything that does NOT depend on the font — the
+# parsed rows plus the mapping as an all-covering font would get it —
+# keyed by the CSV's content hash, and a warm run only unmarshals it and
+# checks cmap coverage. marshal handles exactly the builtin types the
+# payload is made of and is the fastest stdlib deserializer for them;
+# its format is interpreter-specific, hence the version in the key.
+#
+# Bump when the payload layout or the parse/rank rules change.
+_CACHE_FORMAT = 1
+
+
+def _open_csv(csv_file, binary=False):
+    """Open ``csv_file`` — a path, or the CSV's raw UTF-8 bytes — for
+    reading, as text unless ``binary``."""
+    if isinstance(csv_file, (bytes, bytearray)):
+        import io
+
+        buf = io.BytesIO(csv_file)
+        return buf if binary else io.TextIOWrapper(buf, encoding='utf-8')
+    if binary:
+        return open(csv_file, 'rb')
+    return open(csv_file, 'r', encoding='utf-8')
+
+
+def _cache_path(csv_file, cache_dir):
+    import hashlib
+    import marshal
+    import sys
+
+    digest = hashlib.sha256()
+    with _open_csv(csv_file, binary=True) as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    digest.update(repr((
+        _CACHE_FORMAT, marshal.version, sys.version_info[:2],
+        MAX_base_chars, MAX_WORD_CHARS, MAX_CHAR_VARIANTS,
+    )).encode())
+    return os.path.join(cache_dir, f"{digest.hexdigest()[:32]}.mapping")
+
+
+def _parse_rows(csv_file):
+    """Font-independent half of load_mapping: one tuple per CSV row
+    with at least two columns, ``(base_chars, annos, weight, note)``.
+
+    ``annos`` is the mute-normalised per-char tuple for CJK rows, the
+    stripped whole annotation for word-unit rows, and None for rows
+    the aggregation ignores (length mismatch, over-long word-unit
+    entries). ``note`` is the "too long" message to print when the
+    row survives the cmap filter.
+    """
+    rows = []
+    with _open_csv(csv_file) as f:
+        for row in csv.reader(f):
+            if len(row) < 2:
+                continue
+            base_chars = row[0]
+            anno_str_raw = row[1]
+            # 詞條權重：如果第三欄是數字則取其值，否則默認為 1
+            weight = int(row[2]) if len(row) > 2 and row[2].isdigit() else 1
+
+            # --- Word-unit rows (see module-level comment) -------------
+            # The WHOLE second column is the annotation; nothing is
+            # split per character, and the entry never participates in
+            # the CJK chain-context word_mapping.
+            if is_word_unit_word(base_chars):
+                if len(base_chars) > MAX_WORD_CHARS:
+                    rows.append((base_chars, None, weight, (
+                        f"Skip, {len(base_chars)} is too long "
+                        f"(>{MAX_WORD_CHARS}), word '{base_chars}'."
+                    )))
+                else:
+                    rows.append(
+                        (base_chars, anno_str_raw.strip(), weight, None)
+                    )
+                continue
+
+            # MUTED-character marker for a character inside a word
+            # (e.g. 毋 in the 合音 拍毋見 → "phàng _ kiàn"). A visible,
+            # non-whitespace token is used so it survives CSV editors /
+            # round-trips that would collapse a literal double-space.
+            # "_" is the canonical marker; the others are accepted as
+            # aliases. All normalise to the empty token, which the rest
+            # of the pipeline treats as "blank annotation".
+            anno_strs = tuple(
+                "" if a in _MUTE_MARKERS else a
+                for a in anno_str_raw.split(" ")
+            )
+            if len(base_chars) != len(anno_strs):
+                rows.append((base_chars, None, weight, None))
+                continue
+            note = None
+            if len(base_chars) > MAX_base_chars:
+                # 新增的列印信息：大於 MAX_base_chars 的詞組跳過
+                note = f"Skip, {len(base_chars)} is too long (>{MAX_base_chars})， word'{base_chars}'。"
+            rows.append((base_chars, anno_strs, weight, note))
+    return rows
+
+
+def _read_cache(path, cmap):
+    """Mapping for ``cmap`` from the cache file at ``path``, or None on
+    a miss. Unreadable or stale entries count as misses."""
+    import gc
+    import marshal
+
+    # Unmarshalling allocates ~10⁶ small containers; with a CJK font
+    # already loaded, the collector passes that triggers cost more than
+    # the load itself.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        with open(path, 'rb') as f:
+            header = marshal.load(f)
+            if header.get("format") != _CACHE_FORMAT:
+                return None
+            print(f"[mapping-cache] hit: {path}")
+            if all(ord(c) in cmap for c in header["chars"]):
+                print(header["messages"], end="")
+                return (header["word_mapping"], header["char_mapping"])
+            rows = marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError, AttributeError):
+        return None
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return _build_mapping(rows, cmap)
+
+
+def _write_cache(path, rows):
+    """Build the font-independent payload for ``rows`` and store it at
+    ``path``: a header record (the mapping an all-covering font gets,
+    plus what building it printed) followed by the rows themselves,
+    which only partially covering fonts read. A failed store only costs
+    the next run a re-parse."""
+    import io
+    import marshal
+    from contextlib import redirect_stdout
+
+    buf = io.StringIO()
+    with redirect_stdout(buf):
+        word_mapping, char_mapping = _build_mapping(rows, None)
+    header = {
+        "format": _CACHE_FORMAT,
+        "chars": "".join(dict.fromkeys(c for row in rows for c in row[0])),
+        "word_mapping": word_mapping,
+        "char_mapping": char_mapping,
+        "messages": buf.getvalue(),
+    }
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            marshal.dump(header, f)
+            marshal.dump(rows, f)
+        os.replace(tmp, path)
+        print(f"[mapping-cache] stored: {path}")
+    except (OSError, ValueError) as e:
+        print(f"[mapping-cache] could not store {path}: {e}")
+    return header
+
+
+def load_mapping(font, csv_file, cache_dir=None):
+    """Parse ``csv_file`` into ``(word_mapping, char_mapping)``, keeping
+    only rows whose every character is in ``font``'s cmap.
+    ``csv_file`` is a path or the CSV's raw UTF-8 bytes.
+
+    With ``cache_dir``, the font-independent work is cached on disk
+    (see ``_CACHE_FORMAT``): a font covering every character in the CSV
+    gets the stored mapping as-is, otherwise the stored rows are
+    re-aggregated under its cmap without re-reading the CSV.
+    """
     cmap = font.getBestCmap()
+    if cache_dir is None:
+        return _build_mapping(_parse_rows(csv_file), cmap)
+    path = _cache_path(csv_file, cache_dir)
+    cached = _read_cache(path, cmap)
+    if cached is not None:
+        return cached
+    rows = _parse_rows(csv_file)
+    header = _write_cache(path, rows)
+    if all(ord(c) in cmap for c in header["chars"]):
+        print(header["messages"], end="")
+        return (header["word_mapping"], header["char_mapping"])
+    return _build_mapping(rows, cmap)
+
+
+def _build_mapping(rows, cmap):
+    """Aggregate ``_parse_rows`` output into ``(word_mapping,
+    char_mapping)``, skipping rows with characters missing from
+    ``cmap`` (None keeps every row)."""
     char_cnt = defaultdict(lambda: defaultdict(int))
     # Characters that appear with an EMPTY annotation inside a word — i.e.
     # muted characters, as in the 合音 拍毋見 → "phàng  kiàn" where 毋 is
@@ -280,87 +461,66 @@ def load_mapping(font, csv_file):
     # raw_word_entries 用於生成最終的 "詞組" 映射 (word_mapping)
     raw_word_entries = []
 
-    # NOTE: we used to also accumulate ``all_csv_entries`` here — a
-    # full list of every CSV row (~95k tuples for mandarin.csv) used
-    # only to power a rare diagnostic about which words drove a
-    # particular reading to be dropped. That cost ~5-10 MB of peak
-    # heap on the Mandarin run for a code path that fires maybe a
-    # dozen times across the whole pipeline. The diagnostic is now
-    # implemented by ``_find_problematic_entries`` above, which
-    # re-reads the CSV lazily only when a character actually exceeds
-    # MAX_CHAR_VARIANTS — a worthwhile trade for shaving allocations
-    # in Pyodide.
-
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if len(row) >= 2:
-                base_chars = row[0]
-                anno_str_raw = row[1]
-                # MUTED-character marker for a character inside a word
-                # (e.g. 毋 in the 合音 拍毋見 → "phàng _ kiàn"). A visible,
-                # non-whitespace token is used so it survives CSV editors /
-                # round-trips that would collapse a literal double-space.
-                # "_" is the canonical marker; the others are accepted as
-                # aliases. All normalise to the empty token, which the rest
-                # of the pipeline treats as "blank annotation".
-                anno_strs = [
-                    "" if a in _MUTE_MARKERS else a
-                    for a in anno_str_raw.split(" ")
-                ]
-                # 詞條權重：如果第三欄是數字則取其值，否則默認為 1
-                weight = int(row[2]) if len(row) > 2 and row[2].isdigit() else 1
-
-                if True in [ord(char) not in cmap for char in base_chars]:
-                    print(f"Skip {base_chars} as there is char not found in the font")
-                    continue
-
-                # --- Word-unit rows (see module-level comment) ---------
-                # The WHOLE second column is the annotation; nothing is
-                # split per character, and the entry never participates
-                # in the CJK chain-context word_mapping. Variants of the
-                # same word accumulate by weight exactly like CJK
-                # per-char readings do.
-                if is_word_unit_word(base_chars):
-                    if len(base_chars) > MAX_WORD_CHARS:
-                        print(
-                            f"Skip, {len(base_chars)} is too long "
-                            f"(>{MAX_WORD_CHARS}), word '{base_chars}'."
-                        )
-                        continue
-                    anno_whole = anno_str_raw.strip()
-                    if anno_whole:
-                        char_cnt[base_chars][anno_whole] += weight
-                    continue
-
-                if len(base_chars) == len(anno_strs):
-                    if len(base_chars) > 1:
-                        if len(base_chars) <= MAX_base_chars: # 只保留長度 <= MAX_base_chars 的詞組
-                            MIN_WEIGHT = 1  # 可調整權重閾值
-                            if weight >= MIN_WEIGHT:
-                                # 詞組處理：儲存詞組、拼音列表和權重 (這部分保持不變，用於生成 word_mapping)
-                                raw_word_entries.append((base_chars, anno_strs, weight))
-                        else:
-                            # 新增的列印信息：大於 MAX_base_chars 的詞組跳過
-                            print(f"Skip, {len(base_chars)} is too long (>{MAX_base_chars})， word'{base_chars}'。")
-
-                    # 單字和字頻處理
-                    for base_char, anno_str in zip(base_chars, anno_strs):
-                        if anno_str != '':
-                            char_cnt[base_char][anno_str] += weight
-                        elif len(base_chars) > 1:
-                            # empty token inside a word → this character is
-                            # muted here (合音); remember to give it a blank
-                            # variant after the real readings are ranked.
-                            blank_chars.add(base_char)
-                            
+    for base_chars, annos, weight, note in rows:
+        if cmap is not None and True in [ord(char) not in cmap for char in base_chars]:
+            print(f"Skip {base_chars} as there is char not found in the font")
+            continue
+        if note is not None:
+            print(note)
+        if annos is None:
+            continue
+
+        # Word-unit rows: variants of the same word accumulate by
+        # weight exactly like CJK per-char readings do.
+        if isinstance(annos, str):
+            if annos:
+                char_cnt[base_chars][annos] += weight
+            continue
+
+        if 1 < len(base_chars) <= MAX_base_chars:  # 只保留長度 <= MAX_base_chars 的詞組
+            MIN_WEIGHT = 1  # 可調整權重閾值
+            if weight >= MIN_WEIGHT:
+                # 詞組處理：儲存詞組、拼音列表和權重 (這部分保持不變，用於生成 word_mapping)
+                raw_word_entries.append((base_chars, list(annos), weight))
+
+        # 單字和字頻處理
+        for base_char, anno_str in zip(base_chars, annos):
+            if anno_str != '':
+                char_cnt[base_char][anno_str] += weight
+            elif len(base_chars) > 1:
+                # empty token inside a word → this character is
+                # muted here (合音); remember to give it a blank
+                # variant after the real readings are ranked.
+                blank_chars.add(base_char)
+
+    # get_tone is a regex search; both rankings below look each
+    # syllable up once here instead of once per occurrence.
+    tone_of = {}
+
+    def tone(anno_str):
+        t = tone_of.get(anno_str)
+        if t is None:
+            t = tone_of[anno_str] = get_tone(anno_str)
+        return t
+
+    # Which words drove a dropped reading — only worth indexing when
+    # some character actually exceeds MAX_CHAR_VARIANTS.
+    overflowing = [
+        char for char, cnts in char_cnt.items()
+        if len(cnts) > MAX_CHAR_VARIANTS
+    ]
+    problematic_index = (
+        _find_problematic_entries(rows, cmap, overflowing)
+        if overflowing else {}
+    )
+
     # --- char_mapping 的排序與截斷邏輯 ---
     char_mapping_raw = {}
     for char, cnts in char_cnt.items():
         # 排序標準: 權重降序 -> 聲調降序 -> 註音降序
         sorted_cnts = sorted(
             cnts.items(),
-            key=lambda item: (item[1], get_tone(item[0]), item[0]),
+            key=lambda item: (item[1], tone(item[0]), item[0]),
             reverse=True
         )
         
@@ -372,15 +532,7 @@ def load_mapping(font, csv_file):
             kept_str = [f"{item[0]} (weight:{item[1]})" for item in kept_variants]
 
             # 為了找出是哪些詞組 (或單字) 使用了這些被丟棄的發音
-            # — re-scan the CSV lazily, only when this rare branch fires,
-            # rather than holding every row in memory through the whole
-            # pipeline. For mandarin.csv this branch fires ~10 times,
-            # so 10 sequential file reads is cheap relative to the
-            # memory we'd otherwise burn.
-            discarded_annos_set = {item[0] for item in discarded_variants}
-            problematic_entries = _find_problematic_entries(
-                csv_file, cmap, char, discarded_annos_set
-            )
+            problematic_entries = problematic_index[char]
 
             # 構建更詳細的 discarded_str
             discarded_str_detailed = []
@@ -420,17 +572,24 @@ def load_mapping(font, csv_file):
     # --- [核心修正] word_mapping 的排序邏輯 ---
     # (這部分不需要修改，它仍然正確地使用 raw_word_entries 來生成 "詞組" 映射)
     
-    # 步驟 1. 按第四標準「註音降序」排序
-    temp_sorted = sorted(raw_word_entries, key=lambda item: " ".join(item[1]), reverse=True)
-    
-    # 步驟 2. 按第三標準「聲調升序」排序 (穩定排序)
-    temp_sorted = sorted(temp_sorted, key=lambda item: tuple(get_tone(s) for s in item[1]))
-    
-    # 步驟 3. 按第二標準「權重降序」排序 (穩定排序)
-    temp_sorted = sorted(temp_sorted, key=lambda item: item[2], reverse=True)
-    
-    # 步驟 4. 按第一標準「詞組長度降序」排序 (穩定排序)，得到最終結果
-    sorted_word_entries = sorted(temp_sorted, key=lambda item: len(item[0]), reverse=True)
+    # 排序標準: 詞組長度降序 -> 權重降序 -> 聲調升序 -> 註音降序，
+    # 全部相同時保持 CSV 原順序。
+    #
+    # One stable sort on the combined key (this used to be four chained
+    # sorts, least significant first). reverse=True still keeps ties in
+    # input order; the tones are negated to come out ascending, which
+    # compares correctly because entries only get as far as the tone
+    # tuples when their lengths are equal.
+    sorted_word_entries = sorted(
+        raw_word_entries,
+        key=lambda item: (
+            len(item[0]),
+            item[2],
+            tuple(-tone(s) for s in item[1]),
+            " ".join(item[1]),
+        ),
+        reverse=True,
+    )
     
     # 由於 Python 3.7+ 的字典會保持插入順序，
     # 這裡生成的 word_mapping_final 將會是已經排序好的。
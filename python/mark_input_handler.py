@@ -34,7 +34,7 @@ from typing import List, Tuple
 from fontTools.otlLib.builder import LigatureSubstBuilder
 
 from build_glyph import MARK_PREFIX
-from utils import get_glyph_name_by_char, register_feature_lookup, step_timer
+from utils import glyph_resolver, register_feature_lookup, step_timer
 
 # Inputs sharing a first glyph live in one LigatureSet; keep them in a
 # single subtable while under the GSUB Type-4 64 KiB offset budget. Past
@@ -62,6 +62,7 @@ def buildMarkInputLiga(output_font, inputs: List[Tuple[str, int]]) -> int:
 
     with step_timer("diy mark-input ligatures") as timer:
         gsub = output_font["GSUB"].table
+        resolve = glyph_resolver(output_font).glyph_name
 
         builder = LigatureSubstBuilder(output_font, None)
         rules_in_subtable = 0
@@ -78,7 +79,7 @@ def buildMarkInputLiga(output_font, inputs: List[Tuple[str, int]]) -> int:
             comps: List[str] = []
             ok = True
             for ch in input_str:
-                g = get_glyph_name_by_char(output_font, ch)
+                g = resolve(ch)
                 if not g:
                     ok = False
                     break
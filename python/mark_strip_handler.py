@@ -44,7 +44,7 @@ from fontTools.otlLib.builder import (
     SingleSubstBuilder,
 )
 
-from utils import get_glyph_name_by_char, register_feature_lookup, step_timer
+from utils import glyph_resolver, register_feature_lookup, step_timer
 
 # Full-width digit zero (U+FF10) — the bare-strip trigger. Script Common,
 # so it joins the preceding CJK run (unlike the Latin full-width letters).
@@ -94,7 +94,7 @@ def buildBareStripLiga(
         gsub = output_font["GSUB"].table
         glyph_order_set = set(output_font.getGlyphOrder())
 
-        zero_glyph = get_glyph_name_by_char(output_font, trigger_char)
+        zero_glyph = glyph_resolver(output_font).glyph_name(trigger_char)
         if not zero_glyph:
             print(
                 f"[diy] bare-strip trigger {trigger_char!r} (U+"
@@ -3,13 +3,16 @@ Runner shim that adapts wing-font.py for invocation from JavaScript via Pyodide.
 
 The original CLI in `wingfont_main.py` (renamed from `wing-font.py` because
 hyphens are not valid in Python module names) reads file paths and writes
-outputs to disk. In a browser there is no real disk, so this module:
+outputs to disk. Its `main(...)` also takes the inputs as bytes and
+returns the outputs as bytes, so in the browser this module:
 
-  1. Writes the uploaded base font, annotation font, and mapping CSV to a
-     scratch directory in Pyodide's in-memory filesystem (MEMFS).
-  2. Calls `wingfont_main.main(...)` with that scratch directory as the
+  1. Hands the uploaded base font, annotation font, and mapping CSV to
+     `wingfont_main.main(...)` as the bytes it was given, with no
      output prefix.
-  3. Reads the resulting `.ttf` and `.woff` back as bytes and returns them.
+  2. Returns the `.ttf` (and, on request, `.woff2`) bytes main() built.
+
+Nothing round-trips through Pyodide's in-memory filesystem (MEMFS)
+except the warm session's mapping cache.
 
 Two entry points:
 
@@ -23,6 +26,10 @@ Two entry points:
     TTFont.open + subset on the original 10-20 MB CJK font, collapsing
     preview latency from 2-4 s to <1 s.
 
+Preview runs (use_trim_cache=True) also keep their parsed fonts and
+composition state alive between calls in a warm session;
+reset_session() drops it.
+
 Everything is synchronous; the caller (a Web Worker) is responsible
 for not blocking the UI.
 """
@@ -69,6 +76,128 @@ if _WINGFONT_DIR not in sys.path:
 _preview_trim_cache: Optional[Tuple[str, str, frozenset, bytes, bytes]] = None
 
 
+# ---------------------------------------------------------------------------
+# Warm pipeline state for repeated previews
+# ---------------------------------------------------------------------------
+#
+# A preview run differs from the previous one in a slider value or a
+# mapping edit far more often than in its fonts. Cold, every run still
+# re-parses both TTFs, the CSV and re-shapes and re-composes every
+# annotation. Preview runs (use_trim_cache=True) therefore go through
+# one long-lived _WarmSession per font pair, which holds:
+#
+#   * a wingfont_main.BatchSession — the parsed (and, for variable
+#     fonts, instanced) base / annotation TTFonts and their bytes, plus
+#     `shared_state`: the HarfBuzz font, shaped annotation runs,
+#     recorded annotation outlines and composed glyphs, each keyed by
+#     the inputs it depends on (see build_glyph.generate_annotated_glyphs),
+#     so only stages whose inputs changed are recomputed;
+#   * a mapping-cache directory, so an unchanged CSV is unmarshalled
+#     instead of re-parsed (mappings.csv_parser.load_mapping).
+#
+# The output is the same as a cold run's.
+#
+# Like the pre-trim cache this holds ONE entry: a different font pair
+# replaces it. `reset_session()` drops it explicitly (the worker can
+# call it on memory pressure). After every run, composed glyphs are
+# kept for the run's own composition settings only (a slider move
+# starts a new bucket and leaves the old one unused), the cached glyph
+# state is dropped once the session's estimated size passes
+# WARM_SESSION_MAX_BYTES, and the whole session goes if its fonts alone
+# do — trimming couldn't bring it under. Full runs
+# (use_trim_cache=False) never touch it: they use the original fonts,
+# which would pin tens of MB.
+WARM_SESSION_MAX_BYTES = 256 << 20
+
+# Parsed TTFont size per byte of font file — a rough ratio for the
+# estimate above; decompiled tables are several times the packed size.
+_PARSED_FONT_FACTOR = 6
+
+# Pyodide MEMFS scratch directory; only the warm session's mapping
+# cache lives here now that main() takes and returns bytes.
+_WORK_DIR = "/tmp/wingfont_run"
+
+
+class _WarmSession:
+    """Pipeline state carried between preview runs on one font pair."""
+
+    def __init__(self, key, font_bytes_len):
+        import wingfont_main
+
+        self.key = key
+        # main() registers the font bytes with it on every run; bytes
+        # equal to what it already holds keep their parsed fonts.
+        self.batch = wingfont_main.BatchSession()
+        self.mapping_cache = os.path.join(_WORK_DIR, "mapping-cache")
+        self._font_bytes_len = font_bytes_len
+        self.runs = 0
+
+    def fonts_nbytes(self) -> int:
+        """Estimated memory held by the session's fonts: their bytes
+        plus the parsed TTFonts."""
+        return self._font_bytes_len * (1 + _PARSED_FONT_FACTOR)
+
+    def nbytes(self) -> int:
+        """Estimated memory held by this session."""
+        from build_glyph import shared_state_nbytes
+
+        mapping_bytes = 0
+        if os.path.isdir(self.mapping_cache):
+            for name in os.listdir(self.mapping_cache):
+                with contextlib.suppress(OSError):
+                    mapping_bytes += os.path.getsize(
+                        os.path.join(self.mapping_cache, name)
+                    )
+        return (
+            self.fonts_nbytes()
+            + shared_state_nbytes(self.batch.shared_state)
+            + mapping_bytes
+        )
+
+    def drop_stale_compositions(self) -> None:
+        """Keep only the most recently used composition bucket."""
+        buckets = self.batch.shared_state.get("composition")
+        if buckets:
+            current = next(reversed(buckets))
+            for bucket in list(buckets):
+                if bucket != current:
+                    del buckets[bucket]
+
+    def trim(self, max_bytes: int) -> bool:
+        """Drop the cached glyph state (keeping the parsed fonts) if the
+        session is over `max_bytes`. Returns whether it did."""
+        if self.nbytes() <= max_bytes:
+            return False
+        self.batch.shared_state.clear()
+        self._clear_mapping_cache()
+        return True
+
+    def _clear_mapping_cache(self) -> None:
+        if os.path.isdir(self.mapping_cache):
+            for name in os.listdir(self.mapping_cache):
+                with contextlib.suppress(OSError):
+                    os.remove(os.path.join(self.mapping_cache, name))
+
+    def close(self) -> None:
+        """Release everything the session holds."""
+        self.batch.close()
+        self._clear_mapping_cache()
+
+
+_warm_session: Optional[_WarmSession] = None
+
+
+def reset_session() -> None:
+    """Drop the warm preview session, if any. The next preview run
+    starts cold."""
+    global _warm_session
+    if _warm_session is not None:
+        _warm_session.close()
+        _warm_session = None
+        import gc
+        gc.collect()
+
+
 def _hash_bytes(data: bytes) -> str:
     """Fast content fingerprint for cache keys. Not for security."""
     return hashlib.md5(data).hexdigest()
@@ -258,6 +387,20 @@ def generate(
     # --out-ascent flag / _resolve_out_ascent for the full policy
     # (including the "off" opt-out, which the CLI exposes).
     out_ascent: int | None = None,
+    # WOFF2 output, forwarded to main(). The default skips it: every
+    # in-browser run — previews above all, whose font is thrown away
+    # after one FontFace load — hands the raw TTF to the page, and the
+    # worker makes the downloadable WOFF (1.0) with CompressionStream.
+    # A caller that wants a WOFF2 built here sets skip_woff=False and
+    # may lower `woff_quality` (Brotli 0-11, None = 11) to trade file
+    # size for encode time.
+    skip_woff: bool = True,
+    woff_quality: int | None = None,
+    # Sample text a preview will render, forwarded to main(). Only the
+    # mapping entries that occur in it are composed and get rules, so
+    # preview cost follows the text rather than the CSV. None (the
+    # full run) builds every entry.
+    preview_text: str | None = None,
     progress_cb=None,
 ):
     """
@@ -266,6 +409,7 @@ def generate(
         {
           "ttf":   <bytes>,
           "woff":  <bytes>,
+          "woff2": <bytes>,  # None unless skip_woff=False
           "stdout": <str>,   # captured stdout from the pipeline
         }
 
@@ -344,30 +488,27 @@ def generate(
                     f"vs cached {c_base[:8]}/{c_anno[:8]}",
                 )
 
-    work_dir = "/tmp/wingfont_run"
-    os.makedirs(work_dir, exist_ok=True)
-
-    base_path = os.path.join(work_dir, "base.ttf")
-    anno_path = os.path.join(work_dir, "anno.ttf")
-    mapping_path = os.path.join(work_dir, "mapping.csv")
-    output_prefix = os.path.join(work_dir, "output")
+    global _warm_session
+    session = None
+    if use_trim_cache:
+        key = (_hash_bytes(base_font_bytes), _hash_bytes(anno_font_bytes))
+        if _warm_session is not None and _warm_session.key != key:
+            reset_session()
+        if _warm_session is None:
+            _warm_session = _WarmSession(
+                key, len(base_font_bytes) + len(anno_font_bytes)
+            )
+        session = _warm_session
+        _emit(
+            progress_cb,
+            f"Warm session run {session.runs + 1} "
+            f"(~{session.nbytes() // (1 << 20)} MB held)",
+        )
 
     # Step convention (matches utils.step_timer's output):
     #   "Processing X..."          shown immediately
     #   "Processing X... DONE (Ns)" shown when finished; UI replaces the
     # previous line in place via GenerateContext.appendOrCoalesce.
-    _t0 = time.perf_counter()
-    _emit(progress_cb, "Processing input files...")
-    with open(base_path, "wb") as f:
-        f.write(base_font_bytes)
-    with open(anno_path, "wb") as f:
-        f.write(anno_font_bytes)
-    with open(mapping_path, "w", encoding="utf-8") as f:
-        f.write(mapping_csv_text)
-    _elapsed = time.perf_counter() - _t0
-    record_step_time("input files", _elapsed)
-    _emit(progress_cb, f"Processing input files... DONE ({_elapsed:.1f}s)")
-
     _t0 = time.perf_counter()
     _emit(progress_cb, "Processing module imports...")
     # Imported lazily so the import cost only hits when we actually generate.
@@ -407,11 +548,11 @@ def generate(
     # coalesces into single updating lines. No outer wrapper needed.
     with contextlib.redirect_stdout(tee):
         try:
-            wingfont_main.main(
-                base_font_file=base_path,
-                anno_font_file=anno_path,
-                output_prefix=output_prefix,
-                mapping=mapping_path,
+            outputs = wingfont_main.main(
+                base_font_file=base_font_bytes,
+                anno_font_file=anno_font_bytes,
+                output_prefix=None,
+                mapping=mapping_csv_text.encode("utf-8"),
                 new_family_name=new_family_name,
                 base_scale=base_scale,
                 anno_scale=anno_scale,
@@ -426,19 +567,37 @@ def generate(
                 out_ascent=out_ascent,
                 # WOFF is generated in JS via CompressionStream — much
                 # faster than Pyodide doing it via wasm-compiled zlib.
-                skip_woff=True,
+                skip_woff=skip_woff,
+                woff_quality=woff_quality,
+                preview_text=preview_text,
+                mapping_cache=(
+                    session.mapping_cache if session is not None else None
+                ),
+                session=session.batch if session is not None else None,
             )
         except Exception:
             traceback.print_exc(file=tee)
+            # A run that died part-way may have left the session's
+            # caches half-filled; start the next preview cold.
+            if session is not None:
+                reset_session()
             raise
 
-    _t0 = time.perf_counter()
-    _emit(progress_cb, "Processing output files...")
-    with open(output_prefix + ".ttf", "rb") as f:
-        ttf_bytes = f.read()
-    _elapsed = time.perf_counter() - _t0
-    record_step_time("output files", _elapsed)
-    _emit(progress_cb, f"Processing output files... DONE ({_elapsed:.1f}s)")
+    if session is not None:
+        session.runs += 1
+        session.drop_stale_compositions()
+        if session.fonts_nbytes() > WARM_SESSION_MAX_BYTES:
+            reset_session()
+            _emit(
+                progress_cb,
+                "Fonts alone over the warm session's memory cap — "
+                "session dropped",
+            )
+        elif session.trim(WARM_SESSION_MAX_BYTES):
+            _emit(
+                progress_cb,
+                "Warm session over its memory cap — cached glyphs dropped",
+            )
 
     # Per-step summary table — emitted line-by-line so the UI's
     # appendOrCoalesce trick doesn't collapse it into one update.
@@ -451,7 +610,8 @@ def generate(
     # the TTF bytes through the browser's CompressionStream, which is
     # an order of magnitude faster than Pyodide doing zlib in wasm.
     return {
-        "ttf": ttf_bytes,
+        "ttf": outputs["ttf"],
         "woff": None,
+        "woff2": outputs["woff2"],
         "stdout": captured.getvalue(),
     }
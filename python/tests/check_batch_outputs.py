@@ -0,0 +1,131 @@
+"""
+check_batch_outputs.py — `wing-font.py batch` must build the same fonts
+as running each entry on its own.
+
+A batch run keeps one BatchSession for all its builds: the parsed (and
+instanced) input fonts, the shaping / annotation-outline caches and the
+composed glyphs are reused from one build to the next, on the premise
+that no build changes them. This script runs a manifest both ways and
+byte-compares every .ttf and .woff2:
+
+  1. `wing-font.py batch MANIFEST` into tests/output/batch/batch/;
+  2. each entry as its own `wing-font.py` process into
+     tests/output/batch/single/.
+
+The default manifest has two groups of builds that share a base and an
+annotation font: the deploy matrix's three Xiaolai-Huninn hero entries,
+and one mapping on the NotoSansHK variable base at two weights (the
+session instances the master once per location). Pass `--manifest` to
+check another list, in the batch command's own format.
+
+Usage (run from the repo root):
+
+    python tests/check_batch_outputs.py [--manifest FILE]
+
+SOURCE_DATE_EPOCH is pinned (unless already set) so head.modified
+matches between the runs. Exits non-zero if any output differs or
+either run fails.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shlex
+import subprocess
+import sys
+from pathlib import Path
+
+THIS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = THIS_DIR.parent
+
+OUTPUT_DIR = THIS_DIR / "output" / "batch"
+
+DEFAULT_MANIFEST = [
+    {"name": "Xiaolai-Huninn-hero-sample", "args": "-opt -i input_fonts/XiaolaiSC-Regular.ttf -a input_fonts/Huninn-Regular.ttf -m mappings/hero-sample.csv -as 0.25"},
+    {"name": "Xiaolai-Huninn-hero-tailo", "args": "-opt -i input_fonts/XiaolaiSC-Regular.ttf -a input_fonts/Huninn-Regular.ttf -m mappings/hero-taigi.csv --diy-annotations diy-mappings/taiwanese/sutian.diy-annotation.csv -as 0.25"},
+    {"name": "Xiaolai-Huninn-hero-pengim", "args": "-opt -i input_fonts/XiaolaiSC-Regular.ttf -a input_fonts/Huninn-Regular.ttf -m mappings/hero-teochew.csv -as 0.25"},
+    {"name": "NotoSansHK-Noto-hero-400", "args": "-opt -i input_fonts/NotoSansHK-VariableFont_wght.ttf -a input_fonts/NotoSerif-Regular.ttf -m mappings/hero-sample.csv -as 0.27 --base-axis wght=400"},
+    {"name": "NotoSansHK-Noto-hero-700", "args": "-opt -i input_fonts/NotoSansHK-VariableFont_wght.ttf -a input_fonts/NotoSerif-Regular.ttf -m mappings/hero-sample.csv -as 0.27 --base-axis wght=700"},
+]
+
+
+def _single_args(entry, output_dir: Path) -> list[str]:
+    """The entry's command line as `wing-font.py batch` completes it."""
+    tokens = shlex.split(entry.get("args", ""))
+    if not {"-f", "--family-name"} & set(tokens):
+        tokens += ["-f", entry["name"]]
+    if not {"-o", "--output-prefix"} & set(tokens):
+        tokens += ["-o", str(output_dir / entry["name"])]
+    return tokens
+
+
+def _run(args, env) -> bool:
+    cmd = [sys.executable, "wing-font.py", *args]
+    result = subprocess.run(
+        cmd, cwd=REPO_ROOT, env=env, stdout=subprocess.DEVNULL
+    )
+    return result.returncode == 0
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument(
+        "--manifest", type=Path,
+        help="JSON list of {name, args} builds (default: see above).",
+    )
+    args = parser.parse_args(argv)
+
+    entries = (
+        json.loads(args.manifest.read_text(encoding="utf-8"))
+        if args.manifest else DEFAULT_MANIFEST
+    )
+    batch_dir = OUTPUT_DIR / "batch"
+    single_dir = OUTPUT_DIR / "single"
+    for directory in (batch_dir, single_dir):
+        directory.mkdir(parents=True, exist_ok=True)
+        for stale in directory.iterdir():
+            stale.unlink()
+    manifest = OUTPUT_DIR / "manifest.json"
+    manifest.write_text(json.dumps(entries, indent=2, ensure_ascii=False))
+
+    env = dict(os.environ)
+    env.setdefault("SOURCE_DATE_EPOCH", "1700000000")
+
+    print(f"Batch:  {len(entries)} builds ...")
+    batch_ok = _run(
+        ["batch", str(manifest), "--output-dir", str(batch_dir)], env
+    )
+    failed = 0 if batch_ok else 1
+    if not batch_ok:
+        print("FAIL batch run exited non-zero")
+
+    for entry in entries:
+        name = entry["name"]
+        print(f"Single: {name} ...")
+        if not _run(_single_args(entry, single_dir), env):
+            print(f"FAIL {name}: single build exited non-zero")
+            failed += 1
+            continue
+        for suffix in (".ttf", ".woff2"):
+            batch_file = batch_dir / f"{name}{suffix}"
+            single_file = single_dir / f"{name}{suffix}"
+            if not batch_file.exists():
+                print(f"FAIL {name}{suffix}: missing from the batch run")
+                failed += 1
+            elif batch_file.read_bytes() != single_file.read_bytes():
+                print(f"FAIL {name}{suffix}: batch and single builds differ")
+                failed += 1
+            else:
+                print(f"ok   {name}{suffix} ({single_file.stat().st_size:,} bytes)")
+
+    print(
+        f"\n{len(entries)} builds: "
+        + ("batch outputs match" if not failed else f"{failed} failure(s)")
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
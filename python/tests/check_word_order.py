@@ -0,0 +1,137 @@
+"""
+check_word_order.py — regression check for load_mapping's word order.
+
+`_build_mapping` used to order word entries with four chained stable
+sorts (annotation desc, then tones asc, then weight desc, then length
+desc) and now does it with one sort on a combined key. This script
+rebuilds word_mapping with the old four passes for every shipped CSV
+under mappings/ and checks that load_mapping returns the same words,
+variants and order:
+
+  * with a cmap covering every character in the CSV, and with one
+    missing every 7th distinct character (rows using those drop out);
+  * without the mapping cache, with a cold cache (parse + store) and
+    with a warm one (the stored mapping or stored rows).
+
+Usage (run from the repo root):
+
+    python tests/check_word_order.py [CSV ...]
+
+Exits non-zero on the first mismatch, printing where the orders part.
+"""
+
+from __future__ import annotations
+
+import io
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+THIS_DIR = Path(__file__).resolve().parent
+REPO_ROOT = THIS_DIR.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from mappings import csv_parser  # noqa: E402
+
+MAPPINGS_DIR = REPO_ROOT / "mappings"
+
+
+class _CmapFont:
+    """Just enough of a TTFont for load_mapping, which only reads the
+    cmap."""
+
+    def __init__(self, codepoints):
+        self._cmap = {cp: f"uni{cp:04X}" for cp in codepoints}
+
+    def getBestCmap(self):
+        return self._cmap
+
+
+def _old_word_mapping(rows, cmap):
+    """word_mapping as _build_mapping built it before the single-sort
+    change: the same row filter, then the four chained sorts."""
+    raw_word_entries = []
+    for base_chars, annos, weight, _note in rows:
+        if any(ord(char) not in cmap for char in base_chars):
+            continue
+        if annos is None or isinstance(annos, str):
+            continue
+        if 1 < len(base_chars) <= csv_parser.MAX_base_chars and weight >= 1:
+            raw_word_entries.append((base_chars, list(annos), weight))
+
+    get_tone = csv_parser.get_tone
+    temp_sorted = sorted(raw_word_entries, key=lambda item: " ".join(item[1]), reverse=True)
+    temp_sorted = sorted(temp_sorted, key=lambda item: tuple(get_tone(s) for s in item[1]))
+    temp_sorted = sorted(temp_sorted, key=lambda item: item[2], reverse=True)
+    sorted_word_entries = sorted(temp_sorted, key=lambda item: len(item[0]), reverse=True)
+
+    word_mapping = {}
+    for word, anno_strs, _ in sorted_word_entries:
+        word_mapping.setdefault(word, []).append(anno_strs)
+    return word_mapping
+
+
+def _first_difference(expected, actual):
+    for i, (e, a) in enumerate(zip(expected, actual)):
+        if e != a:
+            return f"entry {i}: expected {e!r}, got {a!r}"
+    return f"length: expected {len(expected)}, got {len(actual)}"
+
+
+def check_csv(csv_file: Path) -> list[str]:
+    """Compare old and new word order for one CSV under every cmap /
+    cache combination; returns a description of each mismatch."""
+    rows = csv_parser._parse_rows(csv_file)
+    chars = sorted({ord(c) for row in rows for c in row[0]})
+    cmaps = {
+        "full": set(chars),
+        "partial": {cp for i, cp in enumerate(chars) if i % 7},
+    }
+
+    failures = []
+    for cmap_label, codepoints in cmaps.items():
+        font = _CmapFont(codepoints)
+        expected = list(_old_word_mapping(rows, font.getBestCmap()).items())
+        with tempfile.TemporaryDirectory() as cache_dir:
+            for cache_label, kwargs in (
+                ("no cache", {}),
+                ("cold cache", {"cache_dir": cache_dir}),
+                ("warm cache", {"cache_dir": cache_dir}),
+            ):
+                with redirect_stdout(io.StringIO()):
+                    word_mapping, _ = csv_parser.load_mapping(
+                        font, csv_file, **kwargs
+                    )
+                actual = list(word_mapping.items())
+                if actual != expected:
+                    failures.append(
+                        f"{cmap_label} cmap, {cache_label}: "
+                        + _first_difference(expected, actual)
+                    )
+    return failures
+
+
+def main(argv: list[str]) -> int:
+    csv_files = (
+        [Path(p) for p in argv]
+        if argv
+        else sorted(MAPPINGS_DIR.rglob("*.csv"))
+    )
+    failed = 0
+    for csv_file in csv_files:
+        failures = check_csv(csv_file)
+        name = csv_file.relative_to(REPO_ROOT) if csv_file.is_absolute() else csv_file
+        if failures:
+            failed += 1
+            print(f"FAIL {name}")
+            for failure in failures:
+                print(f"     {failure}")
+        else:
+            print(f"ok   {name}")
+    print(f"\n{len(csv_files) - failed}/{len(csv_files)} CSVs keep the old word order")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))
@@ -9,7 +9,11 @@ modules use `fontTools.otlLib.builder.ChainContextSubstBuilder` and
 otTables construction.
 
 What remains here:
-  - `get_glyph_name_by_char` — small cmap convenience used throughout.
+  - `glyph_resolver` / `get_glyph_name_by_char` — char→glyph resolution
+    against a per-font cmap index, built once and invalidated explicitly
+    whenever the cmap changes.
+  - `derive_font` — the output font as a copy of the (instanced) base
+    font that shares its untouched outlines instead of re-reading them.
   - `register_feature_lookup` — adds a freshly-built lookup to an existing
     GSUB feature, creating the feature record on any script/langsys that
     doesn't yet expose it. Both handlers share this so they don't each
@@ -20,6 +24,7 @@ What remains here:
 """
 
 import time
+import weakref
 
 from fontTools.ttLib.tables import otTables
 
@@ -153,37 +158,187 @@ def maybe_wrap_lookup_in_extension(lookup) -> bool:
     return True
 
 
+class GlyphResolver:
+    """
+    Char→glyph-name index over one font's best cmap.
+
+    ``font.getBestCmap()`` walks the cmap subtables on every call, and
+    the GSUB handlers resolve every character of every word — hundreds
+    of thousands of lookups on a full CJK mapping. The resolver takes
+    that walk once and answers from the cached dict afterwards.
+
+    The cache is only as fresh as the cmap it was built from: anything
+    that adds codepoints or replaces the cmap subtables (trigger-glyph
+    injection, subsetting) must call ``invalidate()`` — or the
+    module-level ``invalidate_glyph_resolver(font)`` — so the next
+    lookup rebuilds it.
+    """
+
+    def __init__(self, font):
+        # Weak: _resolvers' value must not keep its own key alive.
+        self._font = weakref.ref(font)
+        self._cmap = None
+        self._glyph_order = None
+
+    def invalidate(self) -> None:
+        """Drop the cached cmap; the next lookup re-reads the font."""
+        self._cmap = None
+        self._glyph_order = None
+
+    def glyph_name(self, char):
+        """
+        Resolve a Unicode character to a glyph name via the font's best
+        cmap.
+
+        Returns ``None`` if the character is not encoded. Some cmap
+        subtables map to glyph *indices* rather than names (rare but
+        legal); we handle that case by indexing the glyph order.
+
+        Defensive against ``getBestCmap()`` returning ``None`` — that
+        happens when a font has no usable Unicode cmap subtable at all
+        (rare for legit fonts; common when an upstream loader fed us
+        HTML or other garbage instead of font bytes). Treating no-cmap
+        as "char not encoded" gives the caller a clean None instead of
+        a confusing ``TypeError: argument of type 'NoneType' is not
+        iterable``.
+        """
+        cmap = self._cmap
+        if cmap is None:
+            cmap = self._cmap = self._font().getBestCmap() or {}
+        glyph_identifier = cmap.get(ord(char))
+        if isinstance(glyph_identifier, str):
+            return glyph_identifier
+        if isinstance(glyph_identifier, int):
+            if self._glyph_order is None:
+                self._glyph_order = self._font().getGlyphOrder()
+            try:
+                return self._glyph_order[glyph_identifier]
+            except IndexError:
+                return None
+        return None
+
+
+# One resolver per live TTFont. Weak keys so a font dropped by the
+# pipeline (base/anno/output are all released before save) doesn't
+# keep its cmap dict alive through this table — and the resolver only
+# refers back to its font weakly, or every font ever resolved would
+# outlive its build (a batch or warm preview session's output fonts
+# included).
+_resolvers: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def glyph_resolver(font) -> GlyphResolver:
+    """Return the shared ``GlyphResolver`` for ``font``, creating it on
+    first use. Hot loops should hoist ``glyph_resolver(font).glyph_name``
+    out of the loop body."""
+    resolver = _resolvers.get(font)
+    if resolver is None:
+        resolver = _resolvers[font] = GlyphResolver(font)
+    return resolver
+
+
+def invalidate_glyph_resolver(font) -> None:
+    """Mark ``font``'s cached cmap index stale. Call after any change to
+    its cmap subtables or glyph order."""
+    resolver = _resolvers.get(font)
+    if resolver is not None:
+        resolver.invalidate()
+
+
 def get_glyph_name_by_char(font, char):
     """
     Resolve a Unicode character to a glyph name via the font's best cmap.
 
-    Returns ``None`` if the character is not encoded. Some cmap subtables
-    map to glyph *indices* rather than names (rare but legal); we handle
-    that case by indexing the glyph order.
-
-    Defensive against ``getBestCmap()`` returning ``None`` — that
-    happens when a font has no usable Unicode cmap subtable at all
-    (rare for legit fonts; common when an upstream loader fed us
-    HTML or other garbage instead of font bytes). Treating no-cmap
-    as "char not encoded" gives the caller a clean None instead of
-    a confusing ``TypeError: argument of type 'NoneType' is not
-    iterable``.
+    Thin wrapper over ``glyph_resolver(font).glyph_name(char)``, kept
+    for one-off lookups; see ``GlyphResolver.glyph_name`` for the
+    ``None`` cases.
     """
-    cmap = font.getBestCmap()
-    if cmap is None:
-        return None
-    char_code = ord(char)
-    if char_code not in cmap:
-        return None
-    glyph_identifier = cmap[char_code]
-    if isinstance(glyph_identifier, str):
-        return glyph_identifier
-    if isinstance(glyph_identifier, int):
-        try:
-            return font.getGlyphOrder()[glyph_identifier]
-        except IndexError:
-            return None
-    return None
+    return glyph_resolver(font).glyph_name(char)
+
+
+def derive_font(font, source):
+    """
+    Return a mutable copy of ``font`` that shares as much of it as is
+    safe to share.
+
+    ``source`` is what ``font`` was opened from — a path or the raw
+    bytes. The copy opens its own lazy reader over it, so any table
+    ``font`` never decompiled is loaded straight from the file by the
+    copy on first use, exactly as a second ``TTFont(source)`` would.
+    Only tables that ``font`` already holds in memory (which, after
+    instancing, is every table the instancer touched) are carried over:
+
+      * ``glyf`` — a new table over a shallow copy of the glyph dict.
+        The pipeline only ever *assigns* glyphs, so the un-annotated
+        outlines stay shared with ``font``. The exceptions are glyphs
+        the save path edits in place: composites (``recalcBounds`` at
+        compile reads their components from *this* glyf, and the
+        subsetter remaps their component ids) and the first glyph
+        (``.notdef``, which the subsetter clears). Those are deep-copied.
+        Simple glyphs still in their compiled form get a new ``Glyph``
+        over the same bytes: saving expands every glyph it compiles,
+        and a shared one would stay expanded in ``font`` — under a
+        batch or warm preview session, the whole base after one build.
+      * ``hmtx`` / ``vmtx`` — a new table over a copy of the metrics
+        dict; entries are tuples and only ever replaced.
+      * everything else — deep-copied. GSUB, cmap, name and the like are
+        edited in place by the handlers or the subsetter.
+
+    Tables ``font`` no longer has (fvar, gvar, STAT… after instancing)
+    are dropped from the copy, and the copy takes ``font``'s glyph order.
+
+    What this saves over re-opening and re-instancing ``source``: the
+    second instancing pass entirely, and a second set of decompiled
+    outlines — for a variable CJK base that is tens of thousands of
+    glyphs, the largest object in the process.
+    """
+    import copy
+    import io
+
+    from fontTools.ttLib import TTFont
+    from fontTools.ttLib.tables._g_l_y_f import Glyph
+
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    clone = TTFont(source)
+    for tag in list(clone.reader.keys()):
+        if tag not in font:
+            del clone[tag]
+
+    # Load the tables the copy shares glyph-by-glyph even when `font`
+    # hasn't touched them yet; splitting glyf into per-glyph records is
+    # cheap, and the pipeline reads the base outlines anyway.
+    for tag in ("glyf", "hmtx", "vmtx"):
+        if tag in font:
+            font[tag]
+
+    # Lazily-decompiled otTables keep a back-reference to their font;
+    # point any such reference at the copy rather than deep-copying the
+    # whole source font along with them.
+    memo = {id(font): clone}
+    for tag, table in font.tables.items():
+        if tag == "GlyphOrder":
+            continue
+        if tag == "glyf":
+            glyf = copy.copy(table)
+            glyf.glyphs = dict(table.glyphs)
+            notdef = table.glyphOrder[0] if table.glyphOrder else None
+            for name, glyph in glyf.glyphs.items():
+                if name == notdef or glyph.isComposite():
+                    glyf.glyphs[name] = copy.deepcopy(glyph)
+                elif hasattr(glyph, "data"):
+                    glyf.glyphs[name] = Glyph(glyph.data)
+            clone.tables[tag] = glyf
+        elif tag in ("hmtx", "vmtx"):
+            metrics = copy.copy(table)
+            metrics.metrics = dict(table.metrics)
+            clone.tables[tag] = metrics
+        else:
+            clone.tables[tag] = copy.deepcopy(table, memo)
+    # Also hands glyf its own copy of the order (and a fresh reverse
+    # index) now that it's loaded.
+    clone.setGlyphOrder(list(font.getGlyphOrder()))
+    return clone
 
 
 def ensure_trigger_char_glyph(output_font, trigger_char: str) -> bool:
@@ -323,6 +478,7 @@ def ensure_trigger_char_glyph(output_font, trigger_char: str) -> bool:
     # automatically). Mirrors the call at the end of
     # generate_annotated_glyphs in build_glyph.py.
     output_font.setGlyphOrder(output_font["glyf"].glyphOrder)
+    invalidate_glyph_resolver(output_font)
     return True
 
 
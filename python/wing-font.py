@@ -23,14 +23,18 @@ from mark_input_handler import buildMarkInputLiga
 # anyone who wants to call it explicitly (e.g. a future build mode
 # that doesn't go through liga_handler at all).
 from mark_strip_handler import tagMarksAsGdefMarks
+import contextlib
 import gc
 import sys
 import argparse
 from fontTools import subset
 from utils import (
+    derive_font,
     ensure_invisible_glyph,
     ensure_trigger_char_glyph,
     get_glyph_name_by_char,
+    glyph_resolver,
+    invalidate_glyph_resolver,
     step_timer,
 )
 import string
@@ -118,7 +122,8 @@ WORD_UNIT_REPACKER_REQUIRED_THRESHOLD = 10000
 
 
 def _prepare_word_mode_fonts(
-    base_font, output_font, base_font_file, base_axis_location
+    base_font, output_font, base_font_file, base_axis_location, session=None,
+    base_instance_bytes=None,
 ):
     """Word-unit (Arabic/Thai) mode needs raw base-font bytes for
     HarfBuzz shaping. Returns ``(base_font_bytes, output_font)`` —
@@ -140,20 +145,111 @@ def _prepare_word_mode_fonts(
         at a time (30s+ instead of ~1s). The round-trip preserves the
         baked-in wrapping through subset + save.
       * Static base — just read the file.
+
+    Under a batch `session` both byte strings come from its caches;
+    `base_instance_bytes` (the serialised instance main() reloaded
+    base_font from, saved the same way) stands in for the
+    serialisation.
     """
     if base_axis_location and "fvar" not in base_font:
         import io as _io
-        _buf = _io.BytesIO()
-        base_font.save(_buf)
-        base_font_bytes = _buf.getvalue()
+        if base_instance_bytes is not None:
+            base_font_bytes = base_instance_bytes
+        elif session is None:
+            _buf = _io.BytesIO()
+            base_font.save(_buf)
+            base_font_bytes = _buf.getvalue()
+        else:
+            base_font_bytes = session.font_bytes(
+                base_font_file, base_axis_location
+            )
         output_font.close()
         output_font = TTFont(_io.BytesIO(base_font_bytes))
-    else:
+    elif session is None:
         with open(base_font_file, "rb") as _f:
             base_font_bytes = _f.read()
+    else:
+        base_font_bytes = session.read_bytes(base_font_file)
     return base_font_bytes, output_font
 
 
+def _is_path(obj):
+    """Whether a main() input is a file path rather than the data."""
+    import os as _os
+    return isinstance(obj, (str, _os.PathLike))
+
+
+def _write_bytes(path, data):
+    """Write `data` to `path` (the TTF half of the Phase 4 save)."""
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+@contextlib.contextmanager
+def _woff2_quality(quality):
+    """Run fontTools' WOFF2 encoder at Brotli `quality` inside the block.
+
+    fontTools calls ``brotli.compress(data, mode=MODE_FONT)`` with the
+    library default (11, the maximum) and has no option for anything
+    else, so for the duration of the block its module-level `brotli`
+    is swapped for one whose `compress` passes `quality` through. None
+    leaves the encoder untouched.
+    """
+    if quality is None:
+        yield
+        return
+    import functools
+    import types
+    from fontTools.ttLib import woff2
+
+    real = woff2.brotli
+    woff2.brotli = types.SimpleNamespace(
+        compress=functools.partial(real.compress, quality=quality),
+        decompress=real.decompress,
+        MODE_FONT=real.MODE_FONT,
+        MODE_TEXT=real.MODE_TEXT,
+    )
+    try:
+        yield
+    finally:
+        woff2.brotli = real
+
+
+def _check_component_references(output_font):
+    """--component-bases post-subset check: every glyf component must
+    still resolve to a glyph in the font. The subsetter's glyf closure
+    is what keeps the ``wingfontbase*`` / ``wingfontanno*`` helpers
+    alive (they're in no keep list and no cmap), so a dangling
+    reference here means a variant would render blank — fail the build
+    instead of shipping that.
+
+    Only composites are decompiled; simple glyphs are identified from
+    their raw glyf record without expanding them."""
+    glyf = output_font["glyf"]
+    present = set(output_font.getGlyphOrder())
+    dangling = {}
+    for name in output_font.getGlyphOrder():
+        if not glyf.glyphs[name].isComposite():
+            continue
+        for component in glyf[name].components:
+            if component.glyphName not in present:
+                dangling.setdefault(component.glyphName, name)
+    if dangling:
+        sample = ", ".join(
+            f"{comp} (used by {user})"
+            for comp, user in sorted(dangling.items())[:5]
+        )
+        print(
+            f"\n[wing-font] --component-bases: {len(dangling)} component "
+            f"glyph(s) did not survive subsetting: {sample}\n",
+            flush=True,
+        )
+        raise RuntimeError(
+            "component glyphs missing after subset "
+            "(--component-bases)"
+        )
+
+
 def _word_mode_keep_glyphs(base_font, char_mapping, word_components):
     """Extra glyphs the optimize/subset path must keep for word-unit
     outputs:
@@ -643,13 +739,19 @@ def tag_wing_font_version(font):
 
 
 def _check_glyph_count_budget(
-    output_font, char_mapping, optimize, mapping_path, diy_pua_map=None
+    output_font,
+    char_mapping,
+    optimize,
+    mapping_path,
+    diy_pua_map=None,
+    component_bases=False,
+    base_scale=0.75,
 ):
     """Pre-flight check: bail early if the predicted output glyph count
     would exceed OpenType's hard 65,535 ceiling. Returns a dict carrying
     the per-feature emit decisions the caller should honour:
 
-        {"emit_bare_bases": bool}
+        {"emit_bare_bases": bool, "component_bases": bool}
 
     Most builds get ``{"emit_bare_bases": True}`` — every annotated
     single-char entry gets a paired bare (un-annotated) glyph so the
@@ -687,7 +789,13 @@ def _check_glyph_count_budget(
       * without ``-opt``, every glyph already in ``output_font`` survives
         AS WELL AS the new ones we add;
       * DIY (--diy-annotations) adds one mark glyph per distinct DIY
-        annotation, on top of the per-character bare base.
+        annotation, on top of the per-character bare base;
+      * --component-bases adds one annotation helper per distinct
+        annotation plus one base helper per polyphonic char — except
+        where that char's bare glyph doubles as its base (bare bases on
+        and an integral centring offset). Bases whose centred
+        annotation lands on a different sub-unit x add a few more
+        annotation helpers, not counted here.
 
     So:
         predicted = NEW + bare_bases + diy_marks + (1000 if optimize else existing)
@@ -699,8 +807,26 @@ def _check_glyph_count_budget(
       2. If predicted WITHOUT bare bases still overflows, raise the
          original budget error — there's no way to fit, and the user
          needs to trim the CSV.
+    --component-bases helpers are dropped (flattened output) before
+    bare bases are, and again whenever they alone would overflow.
     """
     predicted_new = sum(len(v) for v in char_mapping.values())
+    helpers_with_bare = helpers_without_bare = 0
+    if component_bases:
+        single = {k: v for k, v in char_mapping.items() if len(k) == 1}
+        anno_helpers = len({anno for v in single.values() for anno in v})
+        polyphonic = [k for k, v in single.items() if len(v) > 1]
+        cmap = output_font.getBestCmap()
+        hmtx = output_font["hmtx"]
+        helpers_without_bare = anno_helpers + len(polyphonic)
+        helpers_with_bare = anno_helpers + sum(
+            1
+            for k in polyphonic
+            if ord(k) in cmap
+            and not float(
+                hmtx[cmap[ord(k)]][0] * (1 - base_scale) / 2
+            ).is_integer()
+        )
     existing = output_font["maxp"].numGlyphs
     # Bare bases — one per single-char mapped entry — are ALWAYS emitted
     # by default now (was DIY-only). They survive --optimize because
@@ -738,9 +864,23 @@ def _check_glyph_count_budget(
         + f" + ~{structural:,} structural glyphs"
     )
 
-    # Happy path: bare-bases fit.
+    def _note_components_dropped(helpers):
+        print(
+            f"[wing-font] --component-bases needs ~{helpers:,} helper "
+            f"glyphs, which would push the glyph count over the cap "
+            f"({GLYPH_BUDGET_SOFT_CAP:,}). Composing flattened variant "
+            f"glyphs for this build instead — same rendering, larger "
+            f"glyf.",
+            flush=True,
+        )
+
+    # Happy path: bare-bases fit. Component helpers go before bare
+    # bases do — they only save bytes, bare bases back the `字0` rule.
+    if predicted_with_bare + helpers_with_bare <= GLYPH_BUDGET_SOFT_CAP:
+        return {"emit_bare_bases": True, "component_bases": component_bases}
     if predicted_with_bare <= GLYPH_BUDGET_SOFT_CAP:
-        return {"emit_bare_bases": True}
+        _note_components_dropped(helpers_with_bare)
+        return {"emit_bare_bases": True, "component_bases": False}
 
     # Bare-bases would overflow; check whether dropping them fits.
     if predicted_without_bare <= GLYPH_BUDGET_SOFT_CAP:
@@ -754,7 +894,16 @@ def _check_glyph_count_budget(
             f"(`字1`, `字２`, `字丅一`, …) remain available.",
             flush=True,
         )
-        return {"emit_bare_bases": False}
+        keep_components = (
+            predicted_without_bare + helpers_without_bare
+            <= GLYPH_BUDGET_SOFT_CAP
+        )
+        if component_bases and not keep_components:
+            _note_components_dropped(helpers_without_bare)
+        return {
+            "emit_bare_bases": False,
+            "component_bases": component_bases and keep_components,
+        }
 
     # Even without bare bases, the mapping is too large — raise the
     # original budget error so the user knows to trim the CSV.
@@ -824,6 +973,32 @@ def _repacker_available() -> bool:
     return importlib.util.find_spec("uharfbuzz") is not None
 
 
+def _scope_mapping_to_text(word_mapping, char_mapping, text):
+    """``(word_mapping, char_mapping)`` cut down to the entries that can
+    render in `text`: characters that occur in it, and words / word-unit
+    keys that occur in it as a run. Variant lists are kept whole, so a
+    preview picks the same variants as the full build does.
+
+    Word-unit keys are also matched after NFKD, which is how Thai SARA
+    AM and other precomposed forms differ between a CSV and typed text.
+    """
+    import unicodedata
+
+    decomposed = unicodedata.normalize("NFKD", text)
+
+    def occurs(key):
+        if len(key) == 1:
+            return key in text
+        return key in text or (
+            unicodedata.normalize("NFKD", key) in decomposed
+        )
+
+    return (
+        {w: v for w, v in word_mapping.items() if occurs(w)},
+        {k: v for k, v in char_mapping.items() if occurs(k)},
+    )
+
+
 def _check_word_unit_save_budget(char_mapping, mapping_path):
     """Pre-flight guard for word-unit (Arabic/Thai/Indic) mappings.
 
@@ -926,6 +1101,13 @@ def _format_cli_invocation(
     out_ascent,
     base_axis_location,
     anno_axis_location,
+    jobs=1,
+    component_bases=False,
+    mapping_cache=None,
+    composition_cache=None,
+    instance_cache=None,
+    woff_quality=None,
+    preview_text=None,
 ):
     """Build the equivalent `python wing-font.py ...` command from
     the kwargs main() actually received.
@@ -936,8 +1118,9 @@ def _format_cli_invocation(
     through argparse defaults; for Pyodide / runner.py invocations
     it's the same information but constructed from the runner's
     kwargs, giving the user a clean fallback CLI command they can
-    run locally if Pyodide crashes mid-run (file paths will be
-    Pyodide temp dirs they'd need to substitute).
+    run locally if Pyodide crashes mid-run (inputs and outputs that
+    never were files show as `<base font>`-style placeholders they'd
+    need to substitute).
 
     Args matching the CLI default are omitted to keep the line
     short. Variable-font axis_location dicts have no CLI flag yet
@@ -993,10 +1176,289 @@ def _format_cli_invocation(
     if anno_axis_location:
         for tag, value in anno_axis_location.items():
             parts.append(f"--anno-axis {tag}={_fmt_axis(value)}")
+    if jobs != 1:
+        parts.append(f"--jobs {jobs}")
+    if component_bases:
+        parts.append("--component-bases")
+    if mapping_cache:
+        parts.append(f"--mapping-cache {shlex.quote(str(mapping_cache))}")
+    if composition_cache:
+        parts.append(
+            f"--composition-cache {shlex.quote(str(composition_cache))}"
+        )
+    if instance_cache:
+        parts.append(f"--instance-cache {shlex.quote(str(instance_cache))}")
+    if woff_quality is not None:
+        parts.append(f"--woff-quality {woff_quality}")
+    if preview_text is not None:
+        parts.append(f"--preview-text {shlex.quote(preview_text)}")
 
     return " ".join(parts)
 
 
+def _instantiate_static(font, axis_location, inplace=True):
+    """Static instance of variable `font` at `axis_location`, STAT
+    included in the cleanup.
+
+    `instantiateVariableFont` cleanly drops fvar / gvar / HVAR / MVAR /
+    avar, but leaves STAT (Style Attributes Table) in place. STAT only
+    carries meaningful semantics for variable fonts — it describes axis
+    values for the design space — so a STAT-without-fvar font
+    advertises axes it can't support. An earlier attempt to drop STAT
+    regressed Word rendering, but that was eventually traced to the
+    LF_FACESIZE family-name overflow (since fixed by the guard at the
+    top of main). Retry as part of the spec-compliance pass.
+    """
+    from fontTools.varLib.instancer import instantiateVariableFont
+    font = instantiateVariableFont(font, axis_location, inplace=inplace)
+    if "STAT" in font:
+        del font["STAT"]
+    return font
+
+
+# --- On-disk instance cache -------------------------------------------
+#
+# Instancing a CJK variable font (NotoSansHK, NotoSansTC) takes seconds
+# to tens of seconds, and the deploy matrix instances the same few
+# masters at the same default location dozens of times. With a cache
+# directory the serialised static instance is stored once per (master
+# content, axis location, fontTools version) and later builds parse it
+# instead of instancing. The same bytes are what HarfBuzz shapes the
+# annotation font from and what word mode reloads the base from, so a
+# hit skips that serialisation too.
+#
+# Every instanced build continues from serialised bytes, never from
+# the in-memory instance: the instancer leaves fractional coordinates
+# that only the save rounds, so building from the unsaved instance
+# would make the output depend on whether a cache was in play at all.
+# With bytes everywhere (see _serialised_instance), no cache, a cold cache
+# and a warm one all build the same font. The price is a save and a
+# re-parse on every uncached instanced build — for NotoSansCJKtc's
+# wght 400-700 master (a 20 MB instance at 700): instancing 21s, the
+# save 17s, re-opening glyf/hmtx 0.4s (decompiling every table after
+# that, 12s). A cache hit skips the first two.
+#
+# Bump when what goes into the instance changes (e.g. the STAT cleanup).
+_INSTANCE_CACHE_FORMAT = 1
+
+
+def _serialised_instance(font, axis_location):
+    """Serialised `_instantiate_static(font, axis_location)`. Instances
+    `font` IN PLACE, so callers pass a font they're about to drop."""
+    import io as _io
+    _buf = _io.BytesIO()
+    _instantiate_static(font, axis_location, inplace=True).save(_buf)
+    return _buf.getvalue()
+
+
+def _cached_instance_bytes(
+    path, axis_location, cache_dir, font=None, data=None
+):
+    """Serialised `_instantiate_static` of the variable font at `path`
+    (or given as its raw `data`), from `cache_dir` when it's there and
+    stored into it when not.
+
+    On a miss the instance is made from `font` IN PLACE when given (the
+    caller is about to replace it anyway), else from a fresh TTFont. A
+    failed store only costs the next build a re-instance."""
+    import hashlib
+    import io as _io
+    import os as _os
+    import fontTools
+
+    digest = hashlib.sha256()
+    if data is not None:
+        digest.update(data)
+    else:
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    digest.update(repr((
+        _INSTANCE_CACHE_FORMAT,
+        fontTools.version,
+        tuple(sorted(axis_location.items())),
+    )).encode())
+    cache_path = _os.path.join(cache_dir, f"{digest.hexdigest()[:32]}.ttf")
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        print(f"[instance-cache] hit: {cache_path}")
+        return data
+    except OSError:
+        pass
+
+    if font is None:
+        font = TTFont(_io.BytesIO(data) if data is not None else path)
+    data = _serialised_instance(font, axis_location)
+    try:
+        _os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{cache_path}.{_os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        _os.replace(tmp, cache_path)
+        print(f"[instance-cache] stored: {cache_path}")
+    except OSError as e:
+        print(f"[instance-cache] could not store {cache_path}: {e}")
+    return data
+
+
+class BatchSession:
+    """Input fonts and caches shared by the builds of one
+    `wing-font.py batch` run (see `_batch_cli`).
+
+    A standalone build reads its base and annotation fonts from disk
+    and parses both from scratch. Under a session main() instead takes:
+
+      * the raw bytes of every input file, read once per run;
+      * `base_font` / `anno_font` as one shared, read-only TTFont per
+        ``(path, axis location)`` — instanced (and STAT-stripped) the
+        same way main() does it, so glyf outlines, cmap and the glyph
+        resolver index are decompiled once per font rather than once
+        per build (and, with `--instance-cache`, instanced once per
+        cache rather than once per run);
+      * the cached base bytes as the lazy source behind `output_font`
+        (`utils.derive_font`), the only copy a build mutates;
+      * `shared_state`, handed to generate_annotated_glyphs so shaping
+        results and composed glyphs carry over between builds that
+        use the same fonts and settings.
+
+    `release(path)` drops everything held for one input file; the batch
+    driver calls it after the last build that needs the file.
+
+    Inputs that aren't files — main() called with font bytes, a BytesIO
+    or a TTFont — are registered with `add_input` under a placeholder
+    name, and from then on go through the same methods as a path.
+    """
+
+    def __init__(self):
+        self._bytes: dict = {}
+        # (realpath, location key) -> TTFont / serialised instance bytes
+        self._fonts: dict = {}
+        self._instance_bytes: dict = {}
+        # Instances parsed from the on-disk instance cache -> its bytes
+        self._sources: dict = {}
+        # Keys of the inputs registered through add_input
+        self._in_memory: set = set()
+        self.shared_state: dict = {}
+
+    @staticmethod
+    def _key(path, axis_location):
+        import os as _os
+        return (
+            _os.path.realpath(path),
+            tuple(sorted((axis_location or {}).items())),
+        )
+
+    def add_input(self, name, source):
+        """Register an in-memory input font and return the name main()
+        then uses in place of its path. `source` is the font's bytes, a
+        binary file object, or a TTFont (serialised once here, so the
+        pipeline never touches the caller's object). A path is returned
+        unchanged. Re-registering identical bytes under the same name
+        keeps everything already parsed from them."""
+        import io as _io
+        if _is_path(source):
+            return source
+        if isinstance(source, TTFont):
+            _buf = _io.BytesIO()
+            source.save(_buf)
+            data = _buf.getvalue()
+        elif hasattr(source, "getvalue"):
+            data = source.getvalue()
+        elif hasattr(source, "read"):
+            data = source.read()
+        else:
+            data = bytes(source)
+        key = self._key(name, None)[0]
+        if self._bytes.get(key) != data:
+            self.release(name)
+            self._bytes[key] = data
+        self._in_memory.add(key)
+        return name
+
+    def is_in_memory(self, path):
+        """Whether `path` names an `add_input` registration."""
+        return self._key(path, None)[0] in self._in_memory
+
+    def read_bytes(self, path):
+        """Raw bytes of `path`, read from disk on first use only."""
+        key = self._key(path, None)[0]
+        data = self._bytes.get(key)
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+            self._bytes[key] = data
+        return data
+
+    def font(self, path, axis_location=None, cache_dir=None):
+        """Shared read-only TTFont for `path`, instanced at
+        `axis_location` when that is given and the font is variable —
+        through the on-disk instance cache in `cache_dir` if given."""
+        import io as _io
+        key = self._key(path, axis_location)
+        font = self._fonts.get(key)
+        if font is None:
+            master = self.font(path) if axis_location else None
+            if master is not None and "fvar" in master:
+                # Always from the serialised instance; see
+                # _serialised_instance.
+                if cache_dir:
+                    data = _cached_instance_bytes(
+                        path, axis_location, cache_dir,
+                        data=self.read_bytes(path),
+                    )
+                else:
+                    data = _serialised_instance(
+                        TTFont(_io.BytesIO(self.read_bytes(path))),
+                        axis_location,
+                    )
+                self._instance_bytes[key] = self._sources[key] = data
+                font = TTFont(_io.BytesIO(data))
+            elif master is not None:
+                font = master
+            else:
+                font = TTFont(_io.BytesIO(self.read_bytes(path)))
+            self._fonts[key] = font
+        return font
+
+    def font_bytes(self, path, axis_location):
+        """Serialised `font(path, axis_location)`, built once (or taken
+        from the instance cache it was loaded from)."""
+        import io as _io
+        key = self._key(path, axis_location)
+        data = self._instance_bytes.get(key)
+        if data is None:
+            _buf = _io.BytesIO()
+            self.font(path, axis_location).save(_buf)
+            data = self._instance_bytes[key] = _buf.getvalue()
+        return data
+
+    def source(self, path, axis_location=None):
+        """The bytes `font(path, axis_location)` reads its not yet
+        decompiled tables from: the cached instance when it came from
+        the instance cache, else the file itself."""
+        data = self._sources.get(self._key(path, axis_location))
+        return data if data is not None else self.read_bytes(path)
+
+    def close(self):
+        """Release every input and all shared state."""
+        held = set(self._bytes) | {k[0] for k in self._fonts}
+        for path in held:
+            self.release(path)
+        self.shared_state.clear()
+
+    def release(self, path):
+        """Forget every font and byte string held for `path`."""
+        real = self._key(path, None)[0]
+        self._bytes.pop(real, None)
+        self._in_memory.discard(real)
+        for store in (self._fonts, self._instance_bytes, self._sources):
+            for key in [k for k in store if k[0] == real]:
+                font = store.pop(key)
+                if isinstance(font, TTFont):
+                    font.close()
+
+
 def main(
     base_font_file,
     anno_font_file,
@@ -1013,6 +1475,24 @@ def main(
     skip_woff=False,
     base_axis_location=None,
     anno_axis_location=None,
+    # --- WOFF2 compression effort ---
+    #
+    # Brotli quality (0-11) for the WOFF2 encode. None keeps the
+    # encoder's maximum, 11, which is what the deploy matrix ships.
+    # Low values encode many times faster at a few percent larger
+    # files, which suits throwaway preview builds; with `skip_woff`
+    # no WOFF2 is made at all, whatever this says.
+    woff_quality=None,
+    # --- Preview scope ---
+    #
+    # Sample text for a live preview. When given, only the mapping
+    # entries that can render in it — its characters, and the words
+    # that occur in it — are composed and get GSUB rules (see
+    # _scope_mapping_to_text), so a preview costs as much as its text
+    # rather than as much as the whole CSV. The result renders that
+    # text exactly like the full build; anything else is unannotated.
+    # None builds the whole mapping.
+    preview_text=None,
     # --- Override-trigger character ---
     #
     # Controls the character that goes between a base char and a
@@ -1072,19 +1552,97 @@ def main(
     # Word centring for browser centring — see
     # HYBRID_ANNOTATION_DESIGN.md §"Cross-run positioning".
     mark_x_offset=0.0,
+    # --- Phase 1 worker processes ----------------------------------
+    #
+    # Number of processes composing the single-char glyphs (see
+    # build_glyph.generate_annotated_glyphs). 1 keeps everything in
+    # this process; the output is byte-identical for any value. Ignored
+    # under Pyodide, which can't start processes.
+    jobs=1,
+    # --- Component-based variant glyphs ----------------------------
+    #
+    # Store each annotated single-char variant as a glyf composite of a
+    # shared scaled-base helper and a shared annotation helper instead
+    # of flattened contours (see build_glyph.generate_annotated_glyphs).
+    # Same rendering, smaller glyf; off by default.
+    component_bases=False,
+    # --- Parsed-mapping cache --------------------------------------
+    #
+    # Directory for mappings.csv_parser's on-disk cache of the parsed
+    # CSV, keyed by its content hash and shared across base fonts.
+    # None parses the CSV every run.
+    mapping_cache=None,
+    # --- Composed-glyph cache --------------------------------------
+    #
+    # Directory for build_glyph's on-disk cache of composed single-char
+    # glyphs, keyed by the font contents, axis locations, scales and
+    # offsets, so a rerun only composes the (char, annotation) pairs it
+    # hasn't seen. Size-bounded, least recently used buckets evicted
+    # first. None composes everything every run.
+    composition_cache=None,
+    # --- Instanced-font cache --------------------------------------
+    #
+    # Directory for the serialised static instances of variable input
+    # fonts, keyed by the master's content, the axis location and the
+    # fontTools version (see _cached_instance_bytes). None instances
+    # in memory every run.
+    instance_cache=None,
+    # --- Batch session ----------------------------------------------
+    #
+    # A BatchSession shared by every build of a `wing-font.py batch`
+    # run: input fonts are read, parsed and instanced once per run and
+    # composition caches carry over between builds. None (the default,
+    # and every single-build CLI call) loads everything from disk for
+    # this build alone.
+    session=None,
 ):
+    """Build one annotated font.
+
+    `base_font_file` and `anno_font_file` are paths, or the fonts
+    themselves as bytes, a binary file object or a TTFont; `mapping`
+    is a path or the CSV's bytes / text (or a file object holding
+    them). `output_prefix` None writes no files. Either way the result
+    is returned as ``{"ttf": bytes, "woff2": bytes or None}`` (None
+    with `skip_woff`), so runner.py and other in-process callers never
+    round-trip through the filesystem. The CLI is the path-only case.
+    """
+    # ── In-memory inputs ────────────────────────────────────────────
+    # Fonts that aren't paths are registered with a BatchSession under
+    # placeholder names — the caller's session, or a private one for
+    # this build — and from there take the same session paths as batch
+    # inputs: read, parsed and instanced without touching the disk.
+    private_session = False
+    if not (_is_path(base_font_file) and _is_path(anno_font_file)):
+        if session is None:
+            session = BatchSession()
+            private_session = True
+        base_font_file = session.add_input("<base font>", base_font_file)
+        anno_font_file = session.add_input(
+            "<annotation font>", anno_font_file
+        )
+    # load_mapping takes a path or the CSV's raw UTF-8 bytes.
+    if not _is_path(mapping):
+        if hasattr(mapping, "read"):
+            mapping = mapping.read()
+        if isinstance(mapping, str):
+            mapping = mapping.encode("utf-8")
+        mapping = bytes(mapping)
+    mapping_label = mapping if _is_path(mapping) else "<mapping>"
+
     # First log line: the equivalent CLI command this invocation
     # corresponds to. Useful both for CLI users (round-tripping the
     # canonical flag forms) and for Pyodide / runner.py callers
     # (gives the Step 4 progress log a copy-paste-ready local-CLI
-    # fallback if Pyodide crashes mid-run — the file paths will be
-    # Pyodide temp dirs the user needs to substitute, but the
-    # numeric / boolean args are exactly what was passed).
+    # fallback if Pyodide crashes mid-run — in-memory inputs show as
+    # placeholders the user needs to substitute, but the numeric /
+    # boolean args are exactly what was passed).
     print(_format_cli_invocation(
         base_font_file=base_font_file,
         anno_font_file=anno_font_file,
-        mapping=mapping,
-        output_prefix=output_prefix,
+        mapping=mapping_label,
+        output_prefix=(
+            output_prefix if output_prefix is not None else "<output>"
+        ),
         new_family_name=new_family_name,
         base_scale=base_scale,
         anno_scale=anno_scale,
@@ -1097,6 +1655,13 @@ def main(
         out_ascent=out_ascent,
         base_axis_location=base_axis_location,
         anno_axis_location=anno_axis_location,
+        jobs=jobs,
+        component_bases=component_bases,
+        mapping_cache=mapping_cache,
+        composition_cache=composition_cache,
+        instance_cache=instance_cache,
+        woff_quality=woff_quality,
+        preview_text=preview_text,
     ))
 
     # ── DIY inventory: parse `A`, assign internal PUA mark ids ─────
@@ -1179,15 +1744,23 @@ def main(
     import os as _os
     for label, path in (("base font", base_font_file),
                         ("annotation font", anno_font_file)):
+        in_memory = session is not None and session.is_in_memory(path)
         try:
-            size = _os.path.getsize(path)
+            size = (
+                len(session.read_bytes(path)) if in_memory
+                else _os.path.getsize(path)
+            )
         except OSError as e:
             raise SystemExit(f"Cannot read {label} {path!r}: {e}") from e
         if size < 1024:
             head = ""
             try:
-                with open(path, "rb") as f:
-                    head = f.read(64).decode("utf-8", errors="replace")
+                if in_memory:
+                    head = session.read_bytes(path)[:64]
+                else:
+                    with open(path, "rb") as f:
+                        head = f.read(64)
+                head = head.decode("utf-8", errors="replace")
             except OSError:
                 pass
             raise SystemExit(
@@ -1197,10 +1770,16 @@ def main(
                 f"First bytes: {head!r}"
             )
 
-    # Load the fonts and mapping.
-    base_font = TTFont(base_font_file)
-    anno_font = TTFont(anno_font_file)
-    output_font = TTFont(base_font_file)
+    # Load the fonts and mapping. Under a batch session base_font /
+    # anno_font are shared with other builds and must not be mutated.
+    # output_font is derived from base_font once it has been instanced
+    # (see below).
+    if session is None:
+        base_font = TTFont(base_font_file)
+        anno_font = TTFont(anno_font_file)
+    else:
+        base_font = session.font(base_font_file)
+        anno_font = session.font(anno_font_file)
 
     # ── Tier 1: auto-instance a variable BASE font ──────────────────
     # If the base font is variable and the caller didn't pick an
@@ -1267,40 +1846,65 @@ def main(
     # `getGlyphSet(location=...)` calls become no-ops — the font is
     # already at the right location. We keep the kwargs anyway as
     # belt-and-braces (and to spare a wider refactor).
+    #
+    # The build continues from the serialised static instance, which
+    # with `instance_cache` comes from (or goes into) the on-disk
+    # instance cache — see _serialised_instance / _cached_instance_bytes.
+    base_instance_bytes = anno_instance_bytes = None
     if base_axis_location and "fvar" in base_font:
-        from fontTools.varLib.instancer import instantiateVariableFont
-        base_font = instantiateVariableFont(
-            base_font, base_axis_location, inplace=True
-        )
-        # output_font was opened from the same file, so it carries
-        # the same variations. Instance it to the same location so
-        # the un-annotated glyphs (kept via scale_glyphs) match the
-        # weight we picked.
-        output_font = instantiateVariableFont(
-            output_font, base_axis_location, inplace=True
-        )
-        # `instantiateVariableFont` cleanly drops fvar / gvar / HVAR
-        # / MVAR / avar, but leaves STAT (Style Attributes Table) in
-        # place. STAT only carries meaningful semantics for variable
-        # fonts — it describes axis values for the design space —
-        # so a STAT-without-fvar font advertises axes it can't
-        # support. An earlier attempt to drop STAT regressed Word
-        # rendering, but that was eventually traced to the
-        # LF_FACESIZE family-name overflow (since fixed by the
-        # guard at the top of main). Retry as part of the
-        # spec-compliance pass.
-        for f in (base_font, output_font):
-            if "STAT" in f:
-                del f["STAT"]
+        if session is not None:
+            base_font = session.font(
+                base_font_file, base_axis_location, cache_dir=instance_cache
+            )
+        else:
+            import io as _io
+            if instance_cache:
+                base_instance_bytes = _cached_instance_bytes(
+                    base_font_file, base_axis_location, instance_cache,
+                    font=base_font,
+                )
+            else:
+                base_instance_bytes = _serialised_instance(
+                    base_font, base_axis_location
+                )
+            base_font = TTFont(_io.BytesIO(base_instance_bytes))
+
+    # The output font starts as the base font at the location picked
+    # above, so the un-annotated glyphs (kept via scale_glyphs) match
+    # the chosen weight. Rather than opening base_font_file a second
+    # time and instancing it again, derive it from base_font in memory:
+    # untouched outlines and metrics are shared, tables the pipeline
+    # edits are copied, and anything base_font never decompiled is read
+    # lazily from the same source. See utils.derive_font.
+    if session is not None:
+        base_source = session.source(base_font_file, base_axis_location)
+    elif base_instance_bytes is not None:
+        base_source = base_instance_bytes
+    else:
+        base_source = base_font_file
+    output_font = derive_font(base_font, base_source)
 
     if anno_axis_location and "fvar" in anno_font:
-        from fontTools.varLib.instancer import instantiateVariableFont
-        anno_font = instantiateVariableFont(
-            anno_font, anno_axis_location, inplace=True
-        )
-        # Same STAT-residue cleanup as the base-instance path above.
-        if "STAT" in anno_font:
-            del anno_font["STAT"]
+        if session is not None:
+            anno_font = session.font(
+                anno_font_file, anno_axis_location, cache_dir=instance_cache
+            )
+        else:
+            import io as _io
+            if instance_cache:
+                anno_instance_bytes = _cached_instance_bytes(
+                    anno_font_file, anno_axis_location, instance_cache,
+                    font=anno_font,
+                )
+            else:
+                anno_instance_bytes = _serialised_instance(
+                    anno_font, anno_axis_location
+                )
+            anno_font = TTFont(_io.BytesIO(anno_instance_bytes))
+
+    base_in_memory = session is not None and session.is_in_memory(
+        base_font_file
+    )
 
     # Raw annotation-font bytes for HarfBuzz. Two paths:
     #   • If the anno font was instanced, the on-disk bytes are
@@ -1312,16 +1916,38 @@ def main(
     #     a 10+ MB CJK font when nothing changed.
     if anno_axis_location and "fvar" not in anno_font:
         # `not in` is true post-instancing (instantiateVariableFont
-        # removes fvar). Serialise the in-memory static font.
-        import io as _io
-        _buf = _io.BytesIO()
-        anno_font.save(_buf)
-        anno_font_bytes = _buf.getvalue()
-    else:
+        # removes fvar). Reuse the bytes anno_font was reloaded from;
+        # only a static font given an axis location is serialised.
+        if anno_instance_bytes is not None:
+            anno_font_bytes = anno_instance_bytes
+        elif session is None:
+            import io as _io
+            _buf = _io.BytesIO()
+            anno_font.save(_buf)
+            anno_font_bytes = _buf.getvalue()
+        else:
+            anno_font_bytes = session.font_bytes(
+                anno_font_file, anno_axis_location
+            )
+    elif session is None:
         with open(anno_font_file, "rb") as _f:
             anno_font_bytes = _f.read()
+    else:
+        anno_font_bytes = session.read_bytes(anno_font_file)
 
-    word_mapping, char_mapping = load_mapping(base_font, mapping)
+    word_mapping, char_mapping = load_mapping(
+        base_font, mapping, cache_dir=mapping_cache
+    )
+    if preview_text is not None:
+        _total = len(word_mapping) + len(char_mapping)
+        word_mapping, char_mapping = _scope_mapping_to_text(
+            word_mapping, char_mapping, preview_text
+        )
+        print(
+            f"[preview] {len(char_mapping):,} char and "
+            f"{len(word_mapping):,} word entries of {_total:,} "
+            f"occur in the preview text"
+        )
 
     # ── Pre-flight: glyph count vs OpenType's uint16 ceiling ─────────
     # Most word-unit mappings (Thai, Arabic) and the larger CJK
@@ -1330,18 +1956,26 @@ def main(
     # ~4 minutes in, deep inside `output_font.save(...)`, with an
     # opaque `struct.error: 'H' format requires 0 <= number <= 65535`.
     # Check now so we can bail with an actionable error in milliseconds.
-    # Returns a dict carrying the per-feature emit decisions: currently
-    # only `emit_bare_bases`. False when bare-base emission would push
-    # the count over the cap but dropping bare bases keeps it under;
+    # Returns a dict carrying the per-feature emit decisions:
+    # `emit_bare_bases` is False when bare-base emission would push the
+    # count over the cap but dropping bare bases keeps it under, and
+    # `component_bases` turns off when its helper glyphs wouldn't fit;
     # raises RuntimeError when even without bare bases the count would
     # overflow.
     _budget_advice = _check_glyph_count_budget(
-        output_font, char_mapping, optimize, mapping, diy_pua_map=diy_pua_map
+        output_font,
+        char_mapping,
+        optimize,
+        mapping_label,
+        diy_pua_map=diy_pua_map,
+        component_bases=component_bases,
+        base_scale=base_scale,
     )
     emit_bare_bases = _budget_advice["emit_bare_bases"]
+    component_bases = _budget_advice["component_bases"]
     # Same spirit, different ceiling: guard word-unit mappings against
     # the pure-Python save blow-up when uharfbuzz is missing.
-    _check_word_unit_save_budget(char_mapping, mapping)
+    _check_word_unit_save_budget(char_mapping, mapping_label)
 
     # ── Arabic word-unit entries ─────────────────────────────────────
     # Multi-character keys in char_mapping are joining-script (Arabic)
@@ -1360,8 +1994,22 @@ def main(
         # hb-packed bytes when the base was instanced) — see the
         # helper's docstring for the save-time perf rationale.
         base_font_bytes, output_font = _prepare_word_mode_fonts(
-            base_font, output_font, base_font_file, base_axis_location
+            base_font, output_font, base_font_file, base_axis_location,
+            session=session, base_instance_bytes=base_instance_bytes,
         )
+    elif jobs > 1 and (
+        base_axis_location and "fvar" not in base_font or base_in_memory
+    ):
+        # Phase 1's worker processes can't re-open base_font_file for
+        # this base (see base_font_file= below); hand them the bytes it
+        # was loaded from instead of having build_glyph serialise the
+        # whole font again.
+        if base_instance_bytes is not None:
+            base_font_bytes = base_instance_bytes
+        elif session is not None:
+            base_font_bytes = session.source(
+                base_font_file, base_axis_location
+            )
 
     # Filled by generate_annotated_glyphs with caret X positions at
     # letter boundaries of each composed word glyph; consumed by
@@ -1395,9 +2043,9 @@ def main(
     diy_mark_names: list = []
 
     # ── Memory: drop CSV-parse transients before Phase 1 ─────────────
-    # load_mapping does four stable sorts in succession (each allocates
-    # a fresh list) plus builds char_cnt as a nested defaultdict that's
-    # not returned. Pyodide's GC won't reap those until something
+    # load_mapping sorts every word entry (a fresh 100k-tuple list plus
+    # one key tuple per entry) and builds char_cnt as a nested
+    # defaultdict that's not returned. Pyodide's GC won't reap those until something
     # forces it; ~5-10 MB of transient state can be reclaimed before
     # the heavy compose+build phases kick in.
     gc.collect()
@@ -1459,9 +2107,33 @@ def main(
         # `字丅一`, …) remain unaffected.
         emit_bare_bases=emit_bare_bases,
         bare_base_map=bare_base_map,
+        jobs=jobs,
+        # Workers re-open the base from disk unless it was instanced
+        # above (then the file no longer matches the in-memory font and
+        # they get base_font_bytes) or never was a file.
+        base_font_file=(
+            None if base_axis_location and "fvar" not in base_font
+            or base_in_memory
+            else base_font_file
+        ),
+        component_bases=component_bases,
+        composition_cache=composition_cache,
+        # The cache identifies an instanced base by its source file
+        # (or bytes) plus base_axis_location, so it never has to
+        # re-serialise it.
+        base_font_source=(
+            session.read_bytes(base_font_file) if base_in_memory
+            else base_font_file
+        ),
+        # A private session lives for this build only; nothing to share.
+        shared_state=(
+            session.shared_state
+            if session is not None and not private_session else None
+        ),
     )
     # The base-font blob was only needed for HarfBuzz shaping of word
-    # entries during composition; release it before the GSUB phase.
+    # entries and the worker processes during composition; release it
+    # before the GSUB phase.
     del base_font_bytes
 
     # ── DIY: compose the shared mark glyphs (route A + route B target) ──
@@ -1504,7 +2176,13 @@ def main(
     # `base_font` STAYS alive — Phase 3's scale_glyphs reads outlines
     # from base_font['glyf'] to scale them down into output_font, so
     # it's a hard dependency through the end of the pipeline.
-    anno_font.close()
+    # (A batch session's anno_font is shared with later builds; the
+    # session closes it once the last of them is done. A private one is
+    # released now.)
+    if session is None:
+        anno_font.close()
+    elif private_session:
+        session.release(anno_font_file)
     del anno_font, anno_font_bytes
     gc.collect()
 
@@ -1681,9 +2359,8 @@ def main(
         # Build the keep list. Same logic as before; just hoisted out
         # of the inline block so we can pass it to scale_glyphs BEFORE
         # we actually subset.
-        glyphs_to_be_kept = [
-            get_glyph_name_by_char(base_font, str(i)) for i in range(0, 10)
-        ]
+        resolve_base = glyph_resolver(base_font).glyph_name
+        glyphs_to_be_kept = [resolve_base(str(i)) for i in range(0, 10)]
         for value in char_mapping.values():
             for composed in value.values():
                 # Entries whose composition was skipped (e.g. a word
@@ -1741,7 +2418,7 @@ def main(
             + ''.join(chr(cp) for cp in range(0x3041, 0x30FF + 1))
         )
         for char in chars_to_keep_additionally:
-            glyph_name = get_glyph_name_by_char(base_font, char)
+            glyph_name = resolve_base(char)
             if glyph_name:
                 glyphs_to_be_kept.append(glyph_name)
 
@@ -1837,7 +2514,11 @@ def main(
                 unicodes=sorted(ivs_unicodes | diy_unicodes),
             )
             subsetter.subset(output_font)
-            timer.note(f"{len(valid_glyphs_to_keep)} glyphs kept")
+            invalidate_glyph_resolver(output_font)
+            timer.note(
+                f"{len(valid_glyphs_to_keep)} glyphs kept; "
+                f"also the pre-save GSUB cleanup"
+            )
 
         # ── NB: previous edits in this slot, both reverted ────────────
         #
@@ -2024,7 +2705,7 @@ def main(
     # Runs IN MEMORY on `output_font` before the first save, so:
     #   * The TTF on disk is already cleaned-up — no save/load/save
     #     round-trip just to clean state.
-    #   * The WOFF2 save below reuses the same cleaned in-memory font,
+    #   * The WOFF2 below is encoded from the same compiled TTF bytes,
     #     so both formats carry identical layout-table structure
     #     without a second reload.
     #   * `output_font.cfg[USE_HARFBUZZ_REPACKER]` was set near the top
@@ -2037,14 +2718,61 @@ def main(
     # that landed on this. The proper fix is to find what wing-font.py
     # produces in GSUB that browsers reject and stop producing it;
     # until that's tracked down, this cleanup pass is the workaround.
-    with step_timer("pre-save GSUB cleanup") as _t:
-        _sub = subset.Subsetter()
-        _sub.populate(glyphs=output_font.getGlyphOrder())
-        _sub.subset(output_font)
-        _t.note(f"{output_font['maxp'].numGlyphs} glyphs preserved")
+    #
+    # Only un-optimised builds need it as a separate pass. With
+    # `optimize`, Phase 3's subset already ran the same Subsetter over
+    # the finished GSUB / GDEF / cmap / glyf (nothing after it touches
+    # layout or glyph data — only the hhea / OS/2 ascent and descent
+    # above), so a second whole-font subset here repeats that work. On
+    # Pyodide the two back-to-back passes were one of the slowest
+    # visible steps.
+    #
+    # The one thing the second pass did change: its glyph-only
+    # `populate` requests no variation selectors, so the subsetter
+    # empties and drops the cmap format-14 (IVS) subtable that Phase 3
+    # deliberately kept. Every build has always shipped without it, in
+    # the browsers this workaround targets too, so optimised builds
+    # drop it here by hand rather than start shipping a new cmap
+    # subtable unannounced.
+    if not optimize:
+        with step_timer("pre-save GSUB cleanup") as _t:
+            _sub = subset.Subsetter()
+            _sub.populate(glyphs=output_font.getGlyphOrder())
+            _sub.subset(output_font)
+            invalidate_glyph_resolver(output_font)
+            _t.note(f"{output_font['maxp'].numGlyphs} glyphs preserved")
+    else:
+        output_font["cmap"].tables = [
+            t for t in output_font["cmap"].tables if t.format != 14
+        ]
 
+    if component_bases:
+        _check_component_references(output_font)
+
+    # The font is compiled exactly once. The TTF is those bytes as-is,
+    # and the WOFF2 is encoded from the same bytes rather than from a
+    # second `save(flavor="woff2")`, which recompiled every table —
+    # glyf and the multi-MB GSUB included — only to hand the encoder
+    # identical table data. (fontTools' WOFF2 writer works from raw
+    # table bytes either way and computes its own checksum; the one
+    # thing that used to differ between the two files was
+    # head.modified, stamped separately by each save.)
+    #
+    # Both are returned as bytes; with no `output_prefix` that's all,
+    # and nothing is written.
+    import io as _io
+    ttf_path = None
+    if output_prefix is not None:
+        ttf_path = str(output_prefix) + ".ttf"
     with step_timer("TTF save"):
-        output_font.save(str(output_prefix) + ".ttf")
+        _buf = _io.BytesIO()
+        output_font.save(_buf)
+        ttf_bytes = _buf.getvalue()
+        del _buf
+        if skip_woff and ttf_path is not None:
+            _write_bytes(ttf_path, ttf_bytes)
+
+    woff2_bytes = None
 
     if not skip_woff:
         # WOFF2 = Brotli-compressed sfnt. fontTools' encoder picks up
@@ -2053,24 +2781,48 @@ def main(
         # every GSUB lookup (including ccmp chain-context rules) is
         # byte-preserved across the round-trip.
         #
-        # Reuses the cleaned-up `output_font` in memory — no need to
-        # reload from the just-written .ttf, since the same TTFont
-        # instance is in the post-cleanup state and we only need to
-        # flip the flavor for the WOFF2 encoder to wrap it differently.
-        output_font.flavor = "woff2"
-        with step_timer("WOFF2 save"):
-            output_font.save(str(output_prefix + ".woff2"))
+        # The TTF write runs alongside the encode on a second thread:
+        # file I/O and Brotli both release the GIL. Pyodide can't start
+        # threads, so there the two just run back to back.
+        from fontTools.ttLib import woff2
+
+        _buf = _io.BytesIO()
+        with step_timer("WOFF2 save") as _t, _woff2_quality(woff_quality):
+            if ttf_path is None or sys.platform == "emscripten":
+                if ttf_path is not None:
+                    _write_bytes(ttf_path, ttf_bytes)
+                woff2.compress(_io.BytesIO(ttf_bytes), _buf)
+            else:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=1) as pool:
+                    ttf_written = pool.submit(
+                        _write_bytes, ttf_path, ttf_bytes
+                    )
+                    woff2.compress(_io.BytesIO(ttf_bytes), _buf)
+                    ttf_written.result()
+            woff2_bytes = _buf.getvalue()
+            del _buf
+            if output_prefix is not None:
+                _write_bytes(str(output_prefix) + ".woff2", woff2_bytes)
+            if woff_quality is not None:
+                _t.note(f"brotli quality {woff_quality}")
 
     # Close the font objects. `anno_font` was already closed + deleted
     # right after Phase 1 (see the "release the annotation font ASAP"
     # block) so it isn't repeated here — referring to it would raise
-    # NameError on every successful run.
-    base_font.close()
+    # NameError on every successful run. A batch session's base_font
+    # outlives this build (see BatchSession.release).
+    if session is None:
+        base_font.close()
+    elif private_session:
+        session.release(base_font_file)
     output_font.close()
+    return {"ttf": ttf_bytes, "woff2": woff2_bytes}
 
-# 主程序入口部分保持不變
-if __name__ == "__main__":
-    parser = argparse.ArgumentParser(prog=sys.argv[0])
+
+def _build_arg_parser(prog):
+    """The single-build CLI parser; `batch` manifests reuse it per entry."""
+    parser = argparse.ArgumentParser(prog=prog)
     parser.add_argument('-i', '--base-font-file', help="Base font in .ttf fomrat", required=True)
     parser.add_argument('-a', '--anno-font_file', help="Annotation font in .ttf fomrat", required=True)
     parser.add_argument('-o', '--output-prefix', help="Output prefix for .ttf and .woff file", required=True)
@@ -2159,6 +2911,77 @@ if __name__ == "__main__":
             "HYBRID_ANNOTATION_DESIGN.md §'Cross-run positioning'."
         ),
     )
+    parser.add_argument(
+        '--component-bases',
+        action='store_true',
+        help=(
+            "Store annotated variant glyphs as glyf composites of a shared "
+            "scaled-base helper and a shared annotation helper instead of "
+            "flattened contours. Renders identically; cuts glyf size for "
+            "polyphonic characters and repeated readings."
+        ),
+    )
+    parser.add_argument(
+        '--mapping-cache',
+        metavar='DIR',
+        help=(
+            "Cache the parsed mapping CSV in DIR, keyed by its content, "
+            "so later builds of the same CSV (against any base font) "
+            "skip parsing. Created if missing."
+        ),
+    )
+    parser.add_argument(
+        '--composition-cache',
+        metavar='DIR',
+        help=(
+            "Cache composed single-char glyphs in DIR, keyed by the input "
+            "fonts, axis locations, scales and offsets, so a rebuild only "
+            "composes the (char, annotation) pairs that changed. Oldest "
+            "entries are evicted beyond 1 GiB. Created if missing; "
+            "ignored with --component-bases."
+        ),
+    )
+    parser.add_argument(
+        '--woff-quality',
+        type=int,
+        default=None,
+        metavar='0-11',
+        help=(
+            "Brotli quality for the .woff2 output. Default: 11 (smallest "
+            "file). Low values encode much faster at a few percent "
+            "larger size, e.g. 4 for quick local iterations."
+        ),
+    )
+    parser.add_argument(
+        '--preview-text',
+        metavar='TEXT',
+        default=None,
+        help=(
+            "Only compose glyphs and build rules for the characters in "
+            "TEXT and the mapped words that occur in it. For fast "
+            "throwaway builds that only need to render TEXT."
+        ),
+    )
+    parser.add_argument(
+        '--instance-cache',
+        metavar='DIR',
+        help=(
+            "Cache the static instances of variable input fonts in DIR, "
+            "keyed by the font's content and axis location, so later "
+            "builds skip instancing. Created if missing."
+        ),
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        metavar='N',
+        help=(
+            "Compose the annotated single-char glyphs on N worker "
+            "processes. Default 1 (serial). The output is byte-identical "
+            "for any N; only Phase 1 wall time changes."
+        ),
+    )
     parser.add_argument(
         '--trigger-char',
         default=DEFAULT_TRIGGER_CHAR,
@@ -2219,12 +3042,12 @@ if __name__ == "__main__":
             "--base-axis. Example: --anno-axis wght=500"
         ),
     )
-    try:
-        options = parser.parse_args()
-    except:
-        parser.print_help()
-        exit()
+    return parser
 
+
+def _options_to_main_kwargs(parser, options):
+    """Validate parsed single-build options and turn them into main()
+    kwargs. Errors go through `parser.error`, i.e. exit with usage."""
     # Parse the TAG=VALUE strings collected by --base-axis /
     # --anno-axis into the {tag: float} dicts main() expects. None
     # when no flag was passed so the existing "skip instancing"
@@ -2267,8 +3090,14 @@ if __name__ == "__main__":
                 f"--out-ascent expects 'auto', 'off', or a positive "
                 f"integer; got {options.out_ascent!r}"
             )
+    if options.jobs < 1:
+        parser.error(f"--jobs expects a positive integer; got {options.jobs}")
+    if options.woff_quality is not None and not 0 <= options.woff_quality <= 11:
+        parser.error(
+            f"--woff-quality expects 0-11; got {options.woff_quality}"
+        )
 
-    main(
+    return dict(
         base_font_file = options.base_font_file,
         anno_font_file = options.anno_font_file,
         output_prefix = options.output_prefix,
@@ -2287,4 +3116,144 @@ if __name__ == "__main__":
         anno_axis_location=anno_axis_location,
         diy_annotations=options.diy_annotations,
         mark_x_offset=options.mark_x_offset,
-    )
\ No newline at end of file
+        jobs=options.jobs,
+        component_bases=options.component_bases,
+        mapping_cache=options.mapping_cache,
+        composition_cache=options.composition_cache,
+        instance_cache=options.instance_cache,
+        woff_quality=options.woff_quality,
+        preview_text=options.preview_text,
+    )
+
+
+def _batch_cli(argv):
+    """`wing-font.py batch MANIFEST` — run many builds in one process.
+
+    MANIFEST is a JSON list of ``{"name": ..., "args": ...}`` objects,
+    the same shape as the deploy-pages matrix's `font:` entries: `args`
+    is the single-build command line, to which ``-f NAME -o
+    OUTPUT_DIR/NAME`` is appended unless it already sets them. Every
+    entry is parsed before the first build starts, so a typo fails the
+    run in milliseconds.
+
+    Builds share one BatchSession. They run grouped by (base, annotation
+    font) in first-appearance order, so a group's cached state is freed
+    (and each input file released) as soon as its last build is done;
+    the outputs are the same as running the entries one by one. A failed
+    build is reported and skipped; the exit status is non-zero if any
+    failed.
+    """
+    import json
+    import os as _os
+    import shlex
+    import time
+    import traceback
+
+    parser = argparse.ArgumentParser(prog=f"{sys.argv[0]} batch")
+    parser.add_argument('manifest', help="JSON list of {name, args} builds")
+    parser.add_argument(
+        '--output-dir', default="outputs",
+        help="Directory for entries without their own -o. Default: outputs",
+    )
+    parser.add_argument(
+        '--mapping-cache', metavar='DIR',
+        help="--mapping-cache for every entry that doesn't set its own.",
+    )
+    parser.add_argument(
+        '--composition-cache', metavar='DIR',
+        help="--composition-cache for every entry that doesn't set its own.",
+    )
+    parser.add_argument(
+        '--instance-cache', metavar='DIR',
+        help="--instance-cache for every entry that doesn't set its own.",
+    )
+    options = parser.parse_args(argv)
+
+    with open(options.manifest, encoding="utf-8") as f:
+        entries = json.load(f)
+
+    build_parser = _build_arg_parser(f"{sys.argv[0]} batch [{options.manifest}]")
+    builds = []
+    for entry in entries:
+        name = entry["name"]
+        tokens = shlex.split(entry.get("args", ""))
+        if not {"-f", "--family-name"} & set(tokens):
+            tokens += ["-f", name]
+        if not {"-o", "--output-prefix"} & set(tokens):
+            tokens += ["-o", _os.path.join(options.output_dir, name)]
+        kwargs = _options_to_main_kwargs(
+            build_parser, build_parser.parse_args(tokens)
+        )
+        for key in ("mapping_cache", "composition_cache", "instance_cache"):
+            if kwargs[key] is None:
+                kwargs[key] = getattr(options, key)
+        builds.append((name, kwargs))
+
+    # Group by input-font pair, keeping first-appearance order.
+    groups: dict = {}
+    for name, kwargs in builds:
+        pair = (kwargs["base_font_file"], kwargs["anno_font_file"])
+        groups.setdefault(pair, []).append((name, kwargs))
+    ordered = [b for group in groups.values() for b in group]
+    remaining: dict = {}
+    for _name, kwargs in ordered:
+        for path in (kwargs["base_font_file"], kwargs["anno_font_file"]):
+            remaining[path] = remaining.get(path, 0) + 1
+
+    session = BatchSession()
+    report = []
+    previous_pair = None
+    for index, (name, kwargs) in enumerate(ordered, 1):
+        pair = (kwargs["base_font_file"], kwargs["anno_font_file"])
+        if previous_pair is not None and pair != previous_pair:
+            session.shared_state.clear()
+            gc.collect()
+        previous_pair = pair
+        out_dir = _os.path.dirname(kwargs["output_prefix"])
+        if out_dir:
+            _os.makedirs(out_dir, exist_ok=True)
+        print(f"\n[batch] ({index}/{len(ordered)}) {name}")
+        start = time.perf_counter()
+        try:
+            main(**kwargs, session=session)
+            error = None
+        except (Exception, SystemExit) as e:
+            traceback.print_exc()
+            error = str(e) or type(e).__name__
+        report.append((name, time.perf_counter() - start, error))
+        for path in pair:
+            remaining[path] -= 1
+            if remaining[path] == 0:
+                session.release(path)
+
+    print("\n[batch] summary")
+    for name, elapsed, error in report:
+        status = "ok" if error is None else f"FAILED: {error}"
+        print(f"  {name:40s} {elapsed:7.1f}s  {status}")
+    total = sum(elapsed for _n, elapsed, _e in report)
+    failed = sum(1 for *_rest, error in report if error is not None)
+    print(f"  {len(report)} builds, {failed} failed, {total:.1f}s total")
+    if failed:
+        raise SystemExit(1)
+
+
+def _cli(argv):
+    if argv and argv[0] == "batch":
+        _batch_cli(argv[1:])
+        return
+    parser = _build_arg_parser(sys.argv[0])
+    try:
+        options = parser.parse_args(argv)
+    except SystemExit as e:
+        # argparse has printed the usage line and error; add the full
+        # help, but keep its non-zero status so build_matrix.py and CI
+        # see the failure. (--help exits 0 and has printed it already.)
+        if e.code:
+            parser.print_help()
+        raise
+    main(**_options_to_main_kwargs(parser, options))
+
+
+# 主程序入口部分保持不變
+if __name__ == "__main__":
+    _cli(sys.argv[1:])
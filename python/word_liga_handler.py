@@ -160,7 +160,7 @@ from mappings.csv_parser import (
     get_word_unit_script,
 )
 from utils import (
-    get_glyph_name_by_char,
+    glyph_resolver,
     maybe_wrap_lookup_in_extension,
     register_feature_lookup,
     step_timer,
@@ -339,10 +339,11 @@ def _resolve_select_digits(font):
     """{variant_index: [glyph, ...]} for the digit-suffix path —
     ASCII 0-9 plus the native digit sets of every supported script,
     skipping whichever aren't in the font."""
+    resolve = glyph_resolver(font).glyph_name
     digits: dict = {}
     for i in range(10):
         for ch in (str(i), *(d[i] for d in NATIVE_DIGITS)):
-            name = get_glyph_name_by_char(font, ch)
+            name = resolve(ch)
             if name:
                 digits.setdefault(i, []).append(name)
     return digits
@@ -434,6 +435,7 @@ def buildWordLiga(output_font, char_mapping, word_components=None):
 
         gsub = output_font["GSUB"].table
         glyph_order_set = set(output_font.getGlyphOrder())
+        resolve = glyph_resolver(output_font).glyph_name
         select_digits = _resolve_select_digits(output_font)
 
         # Per-script caches, built lazily for the scripts actually
@@ -451,7 +453,7 @@ def buildWordLiga(output_font, char_mapping, word_components=None):
         def _trigger_glyph_for(behavior):
             if behavior.tag not in trigger_glyph_cache:
                 trigger_glyph_cache[behavior.tag] = (
-                    get_glyph_name_by_char(output_font, behavior.trigger_char)
+                    resolve(behavior.trigger_char)
                     if behavior.trigger_char
                     else None
                 )
@@ -473,7 +475,7 @@ def buildWordLiga(output_font, char_mapping, word_components=None):
         prepared = []
         for word, resolved in word_entries.items():
             comp_glyphs = (word_components or {}).get(word) or [
-                get_glyph_name_by_char(output_font, c) for c in word
+                resolve(c) for c in word
             ]
             if any(
                 not isinstance(g, str) or g not in glyph_order_set
@@ -315,7 +315,6 @@ interface GenerateContextValue {
  * forward instead of stalling.
  */
 const STEP_WEIGHTS: Record<string, number> = {
-  "input files": 0.005,
   "module imports": 0.02, // mostly cached after first run
   "annotated glyph composition": 0.42,
   "chain context substitution": 0.10,
@@ -324,7 +323,6 @@ const STEP_WEIGHTS: Record<string, number> = {
   "font subset": 0.07,
   "TTF save": 0.30,
   "WOFF wrap (JS)": 0.03,
-  "output files": 0.005,
 };
 const DEFAULT_STEP_WEIGHT = 0.01;
 const TOTAL_WEIGHT = Object.values(STEP_WEIGHTS).reduce((s, w) => s + w, 0);
@@ -1034,6 +1032,10 @@ export const GenerateProvider = ({ children }: { children: ReactNode }) => {
         // harmless if the prepare call hasn't completed yet — first
         // preview is then slow, subsequent ones are fast.
         useTrimCache: true,
+        // Only build the entries that can show up in the sample text;
+        // a custom text's covered rows can still hold words that don't
+        // occur in it as a run.
+        previewText: sampleText,
         onProgress: (msg) => {
           // Drive only the small preview status indicator; do NOT
           // touch the main progressLog (Step 4 owns that — it's the
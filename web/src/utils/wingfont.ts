@@ -61,6 +61,13 @@ export interface GenerateParams {
    * and the deploy-pages.yml matrix's --out-ascent argument.
    */
   outAscent?: number | null;
+  /**
+   * Text the preview will render. The runner then only composes
+   * glyphs and builds rules for the mapping entries that occur in it
+   * (its chars, and words appearing in it). null/undefined = build
+   * every entry, as the full run does.
+   */
+  previewText?: string | null;
   onProgress?: (message: string) => void;
 }
 
@@ -257,6 +264,7 @@ export async function generateFont(params: GenerateParams): Promise<GenerateResu
           annoAxisLocation: params.annoAxisLocation,
           triggerChar: params.triggerChar,
           outAscent: params.outAscent,
+          previewText: params.previewText ?? null,
         },
       },
       transfer,
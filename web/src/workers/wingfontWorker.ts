@@ -276,6 +276,9 @@ interface GeneratePayload {
    * to the Python runner as `out_ascent`.
    */
   outAscent?: number | null;
+  /** Forwarded to the Python runner as `preview_text`: only mapping
+   *  entries occurring in this text are built. */
+  previewText?: string | null;
 }
 
 interface PrepareTrimPayload {
@@ -318,6 +321,7 @@ async function handleGenerate(id: string, payload: GeneratePayload): Promise<voi
     // OS/2.usWinAscent to this value before save. Matches the
     // --out-ascent CLI flag's semantics.
     out_ascent: payload.outAscent ?? null,
+    preview_text: payload.previewText ?? null,
   };
   pyodide.globals.set("_params", pyodide.toPy(params));
 